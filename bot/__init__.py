@@ -2,63 +2,258 @@
 Bot Package
 """
 
-import bot.reputation as reputation
-import bot.minesweeper_view as minesweeper_view
-import bot.minesweeper as minesweeper
-import bot.config as config
-import bot.client as client
+from __future__ import annotations
+
+import bisect
+import importlib
+import itertools
+import random
+import sys
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
+
 __version__ = '0.1.0'
 
-from typing import Dict, Literal
+# Canonical config keys as named, interned constants: one source of truth for the string
+# literals and a guaranteed pointer-identity fast path for the dict lookups that use them
+REACT_PROBABILITY = sys.intern('react_probability')
+REPLY_PROBABILITY = sys.intern('reply_probability')
+IMAGE_PROBABILITY = sys.intern('image_probability')
+REACTIONS = sys.intern('reactions')
+REPLIES = sys.intern('replies')
+IMAGES = sys.intern('images')
+REPUTATION_CHANGE = sys.intern('reputation_change')
+USERS = sys.intern('users')
+ROLES = sys.intern('roles')
 
-WeightedActions = Dict[str, int]
-"""
-Dictionary mapping Bot actions to their corresponding probabilities
 
-NOTE: Probabilities must add up to 100
+# Weighted maps at least this large get a Walker alias table for O(1) draws; smaller ones
+# keep the cumulative tuple, which fits in a cache line and wins on setup cost
+_ALIAS_TABLE_MIN = 8
 
-Possible actions:
-    * React: `{'❤️': 100}`
-    * Reply: `{'my message': 100}`
-    * Image Reply: `{'../my_image.jpg', 100}`
-"""
+# Keys an ActionGroup dictionary may contain and the subset whose values are WeightedActions
+_ACTION_GROUP_KEYS = frozenset((REACT_PROBABILITY, REPLY_PROBABILITY, IMAGE_PROBABILITY,
+                                REACTIONS, REPLIES, IMAGES, REPUTATION_CHANGE))
+_WEIGHTED_ACTION_KEYS = (REACTIONS, REPLIES, IMAGES)
 
-ActionGroup = Dict[Literal['react_probability', 'reply_probability',
-                           'image_probability', 'reactions', 'replies',
-                           'images'], int | WeightedActions]
-"""
-Dictionary mapping action probability and action content keys with their integer probabilities
-or `WeightedActions` dictionaries
-
-Action probability keys with integer probabilities as values are:
-    * `'react_probability'`: emoji react on a message with a weighted react
-    * `'reply_probability'`: text reply to a message with a weighted reply
-    * `'image_probability'`: image reply to a message with a weighted image
-
-Keys corresponding to `WeightedActions` are:
-    * `'reactions'`: map of emoji to probabilty
-    * `'replies'`: map of text message to probability
-    * `'images'`: map of image path to probability
-"""
 
-TriggerActionGroups = Dict[str, ActionGroup]
-"""
-Dictionary mapping entity triggers (emoji reacts/message content) with their corresponding
-`ActionGroups`.
-"""
+def validate_action_group(trigger: str, action_group: ActionGroup) -> None:
+    """
+    Enforce the `ActionGroup` invariants once at config load
 
-IDTriggers = Dict[str, TriggerActionGroups]
-"""
-Dictionary mapping entity (user/role) IDs with their corresponding `TriggerActionGroups`
-"""
+    Checks that the group only uses known keys and that every `WeightedActions` dictionary's
+    weights add up to 100 (see the `WeightedActions` docs), so per-event code can trust the
+    compiled tables without re-checking.
 
-EntityTypeIDs = Dict[Literal['users', 'roles'], IDTriggers]
-"""
-Dictionary mapping entity type (user/role) to their corresponding `IDTriggers`
+    Args:
+        trigger: the trigger the group belongs to, used for error messages
+        action_group: the raw `ActionGroup` dictionary to validate
 
-Accepted entity type keys:
-    * `'users'`
-    * `'roles'`
-"""
+    Raises:
+        ValueError: if the group contains an unknown key or a weight sum is not 100
+    """
+
+    unknown_keys = set(action_group) - _ACTION_GROUP_KEYS
+
+    if unknown_keys:
+        raise ValueError(f'Unknown action group key(s) {sorted(unknown_keys)} for trigger '
+                         f'{trigger}')
+
+    for key in _WEIGHTED_ACTION_KEYS:
+        # TypedDict lookups through a variable key type as object; the cast restores the
+        # value type the keys in _WEIGHTED_ACTION_KEYS are declared with
+        weighted = cast('WeightedActions | None', action_group.get(key, None))
+
+        if weighted is not None and sum(weighted.values()) != 100:
+            raise ValueError(f'Weights for {key} of trigger {trigger} must add up to 100')
+
+
+class WeightedTable(NamedTuple):
+    """
+    Compiled form of a `WeightedActions` dictionary as parallel arrays
+
+    Built once at config load by `compile_weighted` so per-event draws touch two flat
+    tuples instead of re-walking a dict and its weights. Tables with `_ALIAS_TABLE_MIN` or
+    more entries also carry a Walker alias table (`probs`/`aliases`) for O(1) sampling.
+    """
+
+    # Labels are the WeightedActions strings for category tables and (action kind, payload)
+    # tuples for the combined tables built by BotConfig, hence the loose element type
+    labels: tuple[Any, ...]
+    cum_weights: tuple[int, ...]
+    total: int
+    probs: tuple[float, ...] | None = None
+    aliases: tuple[int, ...] | None = None
+
+
+def _build_alias(weights: list[int], total: int) -> tuple[tuple[float, ...], tuple[int, ...]]:
+    """
+    Build a Walker alias table from integer weights using Vose's two-stack method
+
+    Args:
+        weights: the integer weights to build the table from
+        total: the sum of `weights`
+
+    Returns:
+        A `(probs, aliases)` tuple where `probs[i]` is the chance of keeping column `i` and
+        `aliases[i]` is the column drawn otherwise
+    """
+
+    count = len(weights)
+    scaled = [weight * count / total for weight in weights]
+    probs = [1.0] * count
+    aliases = list(range(count))
+
+    small = [i for i, value in enumerate(scaled) if value < 1.0]
+    large = [i for i, value in enumerate(scaled) if value >= 1.0]
+
+    while small and large:
+        lesser = small.pop()
+        greater = large.pop()
+
+        probs[lesser] = scaled[lesser]
+        aliases[lesser] = greater
+
+        scaled[greater] -= 1.0 - scaled[lesser]
+
+        if scaled[greater] < 1.0:
+            small.append(greater)
+        else:
+            large.append(greater)
+
+    # Anything left over is 1.0 up to float error and keeps its own column
+
+    return tuple(probs), tuple(aliases)
+
+
+def compile_weighted(actions: dict[Any, int]) -> WeightedTable:
+    """
+    Compile a `WeightedActions`-shaped dictionary into a `WeightedTable`
+
+    Args:
+        actions: a dictionary mapping labels to integer weights; labels are strings for
+            `WeightedActions` and tuples for the combined tables built by `BotConfig`
+
+    Returns:
+        A `WeightedTable` with the labels and their running weight totals, plus a Walker
+        alias table when the map is large enough to benefit
+    """
+
+    labels = tuple(actions.keys())
+    weights = list(actions.values())
+    cum_weights = tuple(itertools.accumulate(weights))
+    total = cum_weights[-1]
+
+    if len(labels) < _ALIAS_TABLE_MIN:
+        return WeightedTable(labels, cum_weights, total)
+
+    probs, aliases = _build_alias(weights, total)
+
+    return WeightedTable(labels, cum_weights, total, probs, aliases)
+
+
+def sample_weighted(table: WeightedTable) -> Any:
+    """
+    Draw one label from a compiled `WeightedTable`
+
+    This moves the cumulative-sum work `random.choices` would redo per event to startup;
+    each draw is either an O(1) alias-table probe or a single uniform integer plus an
+    O(log n) bisect for small tables.
+
+    Args:
+        table: the `WeightedTable` to draw from
+
+    Returns:
+        The selected label
+    """
+
+    probs = table.probs
+    aliases = table.aliases
+
+    # probs and aliases are always set together by compile_weighted; checking both narrows
+    # aliases for the type checker without an extra branch on the bisect path
+    if probs is not None and aliases is not None:
+        column = random.randrange(len(table.labels))
+
+        if random.random() < probs[column]:
+            return table.labels[column]
+
+        return table.labels[aliases[column]]
+
+    return table.labels[bisect.bisect_right(table.cum_weights, random.randrange(table.total))]
+
+# Submodules are imported lazily so that consumers of the type aliases below don't pull in
+# discord.py and the rest of the bot's runtime; this also removes the old "import at the
+# bottom to avoid circular imports" hazard. Submodules that need a sibling import it
+# explicitly (i.e. `from bot import config`) rather than relying on the package namespace.
+_LAZY_SUBMODULES = {'reputation', 'minesweeper_view', 'minesweeper', 'config', 'client'}
+
+
+def __getattr__(name):
+    """
+    Import one of the Bot's submodules on first access and cache it in the package namespace
+    """
+
+    if name in _LAZY_SUBMODULES:
+        module = importlib.import_module(f'bot.{name}')
+        globals()[name] = module
+        return module
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return list(globals()) + list(_LAZY_SUBMODULES)
+
+# The aliases below only exist for type checkers, so they are guarded behind TYPE_CHECKING;
+# at runtime annotations stay as plain strings and we skip building typing generics on every
+# `import bot`
+if TYPE_CHECKING:
+    from typing import Literal, TypedDict
+
+    # Dictionary mapping Bot actions (an emoji react, a reply message, or an image path) to
+    # their corresponding probabilities; probabilities must add up to 100
+    WeightedActions = dict[str, int]
+
+    # Action probability and action content keys with their integer probabilities or
+    # `WeightedActions` dictionaries.
+    #
+    # Keys with integer probabilities as values are:
+    #     * `'react_probability'`: emoji react on a message with a weighted react
+    #     * `'reply_probability'`: text reply to a message with a weighted reply
+    #     * `'image_probability'`: image reply to a message with a weighted image
+    #     * `'reputation_change'`: reputation delta applied when the trigger is an emoji react
+    #
+    # Keys corresponding to `WeightedActions` are:
+    #     * `'reactions'`: map of emoji to probabilty
+    #     * `'replies'`: map of text message to probability
+    #     * `'images'`: map of image path to probability
+    #
+    # The runtime counterpart built once at config load is `bot.config.BotActions`; hot
+    # paths read its attributes rather than hashing these keys per event. The functional
+    # TypedDict form is used because mypyc rejects class statements under a conditional.
+    ActionGroup = TypedDict('ActionGroup', {
+        'react_probability': int,
+        'reply_probability': int,
+        'image_probability': int,
+        'reactions': WeightedActions,
+        'replies': WeightedActions,
+        'images': WeightedActions,
+        'reputation_change': int,
+    }, total=False)
+
+    # Dictionary mapping entity triggers (emoji reacts/message content) with their
+    # corresponding `ActionGroups`
+    TriggerActionGroups = dict[str, ActionGroup]
+
+    # Dictionary mapping entity (user/role) IDs with their corresponding
+    # `TriggerActionGroups`; keys are strings only because JSON requires it, config loading
+    # converts them to `int` once (see `CompiledIDTriggers`) so event handlers can look up
+    # discord.py's integer snowflakes directly without a per-event `str()` conversion
+    IDTriggers = dict[str, TriggerActionGroups]
+
+    # The compiled, int-keyed form of `IDTriggers` produced at config load
+    CompiledIDTriggers = dict[int, TriggerActionGroups]
 
-# Since we are creating type defs in here, we import at the bottom to avoid circular import issues
+    # Dictionary mapping entity type (`'users'` or `'roles'`) to their corresponding
+    # `IDTriggers`
+    EntityTypeIDs = dict[Literal['users', 'roles'], IDTriggers]
@@ -0,0 +1,35 @@
+"""
+Fast JSON hook
+
+Imported for its side effect: swaps discord.py's internal payload encoder for orjson so
+embed-heavy calls like the minesweeper edit_message serialize in C. Recent discord.py
+releases already bind orjson themselves when it is importable (utils.HAS_ORJSON), in which
+case this module leaves everything alone.
+"""
+
+import discord.utils
+
+# orjson is optional; without it discord.py keeps its stdlib encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _to_json(obj) -> str:
+    """
+    Encode an object to a compact JSON string, mirroring discord.utils._to_json
+
+    Args:
+        obj: the payload to encode
+
+    Returns:
+        The JSON string discord.py will send on the wire
+    """
+
+    return orjson.dumps(obj).decode('utf-8')
+
+
+if orjson is not None and not getattr(discord.utils, 'HAS_ORJSON', False) \
+        and hasattr(discord.utils, '_to_json'):
+    discord.utils._to_json = _to_json
@@ -1,730 +1,954 @@
-"""
-Bot Client
-
-Handles Discord sessions and contains code for the Bot's actions
-"""
-
-import logging
-import random
-import time
-from typing import Dict, List
-
-import discord
-import requests
-import supabase
-from discord.ext import commands
-
-from bot.config import BotConfig, BotActions
-from bot.minesweeper_view import MinesweeperView
-from bot.reputation import get_reputation, get_leaderboard, update_reputation
-
-logger = logging.getLogger('discord')
-
-
-def time_description(seconds: int) -> str:
-    """
-    Get a string representing a very approximate description of a time in seconds.
-
-    Args:
-        seconds: the time to get a description for as an integer representing number of seconds
-
-    Returns:
-        A string approximately describing the time in seconds, minutes, or hours
-
-        Ex: 4000 seconds -> "about 1 hour"
-    """
-
-    if seconds < 60:
-        adjusted_time = seconds
-        unit = 'second'
-    elif seconds < 3600:
-        adjusted_time = seconds // 60
-        unit = 'minute'
-    else:
-        adjusted_time = seconds // 3600
-        unit = 'hour'
-
-    return f'about {adjusted_time} {unit}{"s" if adjusted_time > 1 else ""}'
-
-# TODO: Add Logging
-# TODO: Export bot functionality into cogs
-
-
-class BotClient(commands.Bot):
-    """
-    Bot and related Discord client session manager
-
-    All non-command callback functionality is implemented by overriding the corresponding default
-    implementation (i.e. on_ready()). The discord.py package will do all the hard work of handling
-    incoming events and Python's method resolution order (MRO) will handle the rest.
-
-    Command callbacks are created with the `Bot.command()` decorator. Because of this, new custom
-    commands can be added within __init__ itself.
-    """
-
-    _REACT_ACTION = 0
-    _REPLY_ACTION = 1
-    _IMAGE_ACTION = 2
-
-    def __init__(self, config: BotConfig, supabase_client: supabase.Client,
-                 google_api_key: str = None):
-        """
-        Create a new Bot session
-
-        Args:
-            config: a BotConfig describing how this session will behave
-            supabase_client: a Supabase client for interacting with the Supabase database
-            google_api_key: (Optional) the Google API key to enable !news commands, if None !news
-                becomes a no op; defaults to None
-        """
-
-        # Config
-        self._guild_id = config.guild
-        self._allowed_channels = config.allowed_channels
-        self._true_replies = config.true_replies
-        self._commands_config = config.commands
-        self._message_actions = config.message_actions
-        self._reaction_actions = config.reaction_actions
-        self._supabase_client = supabase_client
-        self._google_api_key = google_api_key
-
-        # Runtime state
-        self._active_cooldowns = {}
-
-        # Set intents (basically a Discord bot's permissions and scopes) and create bot
-        intents = discord.Intents.default()
-
-        # pylint: disable=assigning-non-slot
-        intents.members = True
-        intents.message_content = True
-        # pylint: enable=assigning-non-slot
-
-        super().__init__(intents=intents, command_prefix='!')
-
-        @self.check
-        async def check_guild_and_channel(ctx):
-            """
-            Global check for commands to make sure they are called from an allowed guild or channel
-            """
-
-            if ctx.guild.id != self._guild_id:
-                return False
-
-            if ctx.channel.id not in self._allowed_channels:
-                return False
-
-            return True
-
-        ###########################################################################################
-        # User commands                                                                           #
-        ###########################################################################################
-
-        @self.command(name='eightball', help='The Bot gifts you wisdom from beyond')
-        async def eightball(ctx):
-            """
-            User command: causes Bot to send a quote
-
-            TODO: Change config format to have roles/users by message rather than messages by
-            roles/users, right now we have a lot of repeats and it's a bit annoying
-            """
-
-            config = self._commands_config.get('eightball', None)
-
-            if config is None or not await self._is_caller_valid(ctx, config):
-                return
-
-            responses = []
-            response_weights = []
-
-            # Check for user response overrides
-            users = config['actions'].get('users', None)
-
-            if users is not None:
-                user_id = str(ctx.author.id)
-                user_responses = users.get(user_id, None)
-
-                if user_responses is not None:
-                    responses.append(random.choice(user_responses))
-                    response_weights.append(config['response_category_probability']['user'])
-
-            # Get role response
-            roles = config['actions'].get('roles', None)
-
-            if roles is not None:
-                first_role_id = self._get_random_matching_role(
-                    ctx.author.roles, [int(key) for key in roles.keys()])
-
-                if first_role_id is not None:
-                    responses.append(random.choice(roles[str(first_role_id)]))
-                    response_weights.append(config['response_category_probability']['role'])
-
-            # Get generic response
-            generic = config['actions'].get('GENERIC', None)
-
-            if generic is not None:
-                responses.append(random.choice(generic))
-                response_weights.append(config['response_category_probability']['generic'])
-
-            await ctx.send(random.choices(responses, response_weights, k=1)[0])
-
-            cmd_cooldown = self._active_cooldowns.get(ctx.command.name, None)
-
-            if cmd_cooldown is None:
-                self._active_cooldowns[ctx.command.name] = {
-                    'all': time.time() + random.choice(config['cooldowns'])
-                }
-            else:
-                self._active_cooldowns[ctx.command.name]['all'] = time.time() + random.choice(
-                    config['cooldowns'])
-
-        @self.command(name='news',
-                      help='The Bot sends you the latest in news and entertainment')
-        async def news(ctx):
-            """
-            User command: causes Bot to send the latest video from a random youtube channel
-            """
-
-            if self._google_api_key is None:
-                return
-
-            config = self._commands_config['news']
-
-            if config is None or not await self._is_caller_valid(ctx, config):
-                return
-
-            # Get the uploads playlist for a random youtube chanel
-            channel_payload = {
-                'part': 'contentDetails',
-                'id': random.choice(config['youtube_channel_ids']),
-                'maxResults': 1,
-                'key': self._google_api_key
-            }
-            channel_list_r = requests.get(
-                'https://youtube.googleapis.com/youtube/v3/channels', params=channel_payload,
-                timeout=5)
-
-            try:
-                channel_list_r.raise_for_status()
-            except requests.exceptions.HTTPError as err:
-                await ctx.send(f'Uploads playlist fetch recieved {str(err)}')
-
-            uploads_id = channel_list_r.json(
-            )['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-
-            # PlaylistItems.list to get most recent upload
-            playlist_items_payload = {
-                'part': ['contentDetails'],
-                'playlistId': uploads_id,
-                'maxResults': 1,
-                'key': self._google_api_key
-            }
-            playlist_items_list_r = requests.get(
-                'https://youtube.googleapis.com/youtube/v3/playlistItems',
-                params=playlist_items_payload, timeout=5)
-
-            try:
-                channel_list_r.raise_for_status()
-            except requests.exceptions.HTTPError as err:
-                await ctx.send(f'Latest upload fetch received {str(err)}')
-
-            video_id = playlist_items_list_r.json(
-            )['items'][0]['contentDetails']['videoId']
-
-            await ctx.send(f'https://youtube.com/watch?v={video_id}')
-
-            cmd_cooldown = self._active_cooldowns.get(ctx.command.name, None)
-
-            if cmd_cooldown is None:
-                self._active_cooldowns[ctx.command.name] = {
-                    'all': time.time() + random.choice(config['cooldowns'])
-                }
-            else:
-                self._active_cooldowns[ctx.command.name]['all'] = time.time() + random.choice(
-                    config['cooldowns'])
-
-        @self.command(name='ms', help='Minesweeper: Find the mines!')
-        async def minesweeper(ctx, dimensions: int = 4, bombs: int = 3):
-            """
-            User command: create a minesweeper clone using Discord views and buttons
-            """
-
-            config = self._commands_config['ms']
-
-            if config is None or not await self._is_caller_valid(ctx, config):
-                return
-
-            if not 1 < dimensions <= 5:
-                await ctx.send(content='Invalid dimensions')
-                return
-
-            if not 0 < bombs <= dimensions ** 2:
-                await ctx.send(content='Invalid number of aircraft')
-                return
-
-            # Update cooldown
-            cmd_cooldown = self._active_cooldowns.get(ctx.command.name, None)
-            role_id = self._get_random_matching_role(
-                ctx.author.roles, [int(key) for key in config['role_cooldowns'].keys()])
-
-            if role_id is None:
-                cooldown_times = config['cooldowns']
-            else:
-                cooldown_times = range(*config['role_cooldowns'][str(role_id)])
-
-            if cmd_cooldown is None:
-                self._active_cooldowns[ctx.command.name] = {
-                    'users': {ctx.author.id: time.time() + random.choice(cooldown_times)},
-                }
-            else:
-                self._active_cooldowns[ctx.command.name]['users'][ctx.author.id] = \
-                    time.time() + random.choice(cooldown_times)
-
-            logger.info('Set cooldown for %s to %s', ctx.author.display_name,
-                        self._active_cooldowns[ctx.command.name]['users'][ctx.author.id])
-
-            # Setup game board initial state
-            embed = discord.Embed(
-                title=f'{ctx.author.display_name} must find the mines!',
-                color=discord.Color.blurple())
-            embed.add_field(name='Mines:', value=bombs)
-            embed.add_field(name='Moves:', value=0)
-
-            view = MinesweeperView(
-                board_dimension=dimensions,
-                num_bombs=bombs,
-                embed=embed,
-                user=ctx.author,
-                supabase_client=self._supabase_client)
-
-            await ctx.reply(view=view, embed=embed)
-            await view.wait()
-
-        @self.command(name='me', help='Check your reputation')
-        async def reputation_check(ctx):
-            """
-            User command: check your reputation
-
-            Args:
-                user_name: (Optional) the name of the user to check the reputation of; if not
-                    provided, the reputation of the caller will be checked
-            """
-
-            reputation = get_reputation(ctx.author.id, self._supabase_client)
-
-            embed = discord.Embed(
-                title=f'{ctx.author.display_name}\'s Reputation',
-                color=discord.Color.blurple())
-            embed.add_field(name='Score:', value=reputation)
-
-            await ctx.reply(embed=embed)
-
-        @self.command(name='lb', help='Check the reputation leaderboard')
-        async def reputation_leaderboard(ctx, order: str = 't'):
-            """
-            User command: check the reputation leaderboard
-            """
-
-            order = order.lower()
-
-            if order not in ['b', 't']:
-                await ctx.reply('Invalid argument. Must be "b" or "t"')
-                return
-
-            descending = order == 't'
-            leaderboard = get_leaderboard(self._supabase_client, descending)
-
-            if leaderboard is None:
-                return
-
-            embed = discord.Embed(
-                title=f'{"Honorable" if descending else "Shameful"} Leaderboard',
-                color=discord.Color.blurple())
-
-            for i, (user, rep) in enumerate(leaderboard.items()):
-                embed.add_field(
-                    name=f'{i + 1}. {user}',
-                    value=f'Score: {rep}',
-                    inline=False)
-
-            await ctx.reply(embed=embed)
-
-    async def _is_caller_valid(self, ctx, command_config: dict) -> bool:
-        """
-        Verify that a caller for a command is valid and that no cooldown is currently active
-
-        Args:
-            ctx: the command's context
-            command_config: a dictionary describing the command's configuration, must include keys
-                `'enabled'`, `'restricted_roles'`, `'restricted_users`', `'cooldown_message_prob'`,
-                and `'cooldown_messages'`
-
-        Returns:
-            True if caller is valid; False otherwise
-        """
-
-        if not command_config['enabled'] or ctx.author.id in command_config['restricted_users']:
-            return False
-
-        restricted_role = self._get_random_matching_role(
-            ctx.author.roles, command_config['restricted_roles'])
-
-        if restricted_role is not None:
-            await ctx.send(f'Try again in about {random.randint(2, 30)} '
-                           f'{random.choice(["weeks", "months", "years"])}')
-            return False
-
-        """
-        Cooldowns are stored as a dictionary with the command name as the key, and a dictionary
-        containing the cooldowns for the command as the value. The cooldowns dictionary has two
-        keys: 'all' and 'users'. The 'all' key contains the cooldown for all users, and the
-        'users' key contains a dictionary of user IDs mapped to their cooldowns.
-
-         Example:
-        {
-            'bs': {
-                'all': 1234567890.0,
-                'users': {
-                    1234567890: 1234567890.0
-                }
-            }
-        }
-
-        Right now, the 'user' cooldowns take precedence over the 'all' cooldowns. This means that
-        if a user has a cooldown, they will not be able to use the command even if the 'all'
-        cooldown has expired.
-        """
-        cooldowns = self._active_cooldowns.get(ctx.command.name, None)
-        logger.info('Cooldowns for %s: %s', ctx.command.name, cooldowns)
-
-        all_cooldown = None
-        user_cooldowns = None
-
-        if cooldowns is not None:
-            all_cooldown = cooldowns.get('all', None)
-            user_cooldowns = cooldowns.get('users', None)
-
-        in_cooldown = False
-
-        if all_cooldown is not None and time.time() < all_cooldown:
-            in_cooldown = True
-            cooldown_time = all_cooldown
-
-        if user_cooldowns is not None and ctx.author.id in user_cooldowns:
-            user_cooldown = user_cooldowns[ctx.author.id]
-
-            if time.time() < user_cooldown:
-                in_cooldown = True
-                cooldown_time = user_cooldown
-
-        if in_cooldown:
-            if random.randint(0, 100) < command_config['cooldown_message_prob']:
-                time_desc = time_description(int(cooldown_time - time.time()))
-                await ctx.send(f'{random.choice(command_config["cooldown_messages"])}\n'
-                               f'Try again in {time_desc}')
-            return False
-
-        return True
-
-    ###############################################################################################
-    # Event handlers                                                                              #
-    ###############################################################################################
-
-    def _is_event_valid(self, guild_id: int, channel_id: int, author: discord.Member) -> bool:
-        """
-        Verify that an event is in the valid guild or channel and that the author is human
-
-        Args:
-            guild_id: the id of the guild the event is in
-            channel_id: the id of the channel the event is in
-            author: the author `discord.Member` of the event
-
-        Returns:
-            True if the event is valid; False otherwise
-        """
-
-        if guild_id != self._guild_id:
-            return False
-        if channel_id not in self._allowed_channels:
-            return False
-        if author.id == self.user.id or author.bot:
-            return False
-
-        return True
-
-    async def on_ready(self):
-        """
-        Event handler: triggered by a successful websocket connection
-        """
-
-        logger.info('%s has connected to Discord!', self.user.name)
-
-        # TODO: Multi-guild support and scope select by guild
-        supabase_users = self._supabase_client.table('users').select('discord_id').execute().data
-        supabase_user_ids = {int(user['discord_id']) for user in supabase_users}
-
-        guild_members = {member.id: member for member in self.guilds[0].members if not member.bot}
-        ids_not_in_db = set(guild_members.keys()) - supabase_user_ids
-
-        user_rows = [{'discord_id': discord_id,
-                      'discord_name': guild_members[discord_id].name,
-                     'is_admin': False} for discord_id in ids_not_in_db]
-
-        res = self._supabase_client.table('users').insert(user_rows).execute()
-        logger.info('Added %s users to the database', len(res.data))
-
-    async def on_member_join(self, member: discord.Member):
-        """
-        Event handler: triggered when a new user joins the guild
-
-        Args:
-            member: the `discord.Member` that joined
-        """
-
-        if member.bot:
-            return
-
-        self._supabase_client.table('users').insert(
-            {'discord_id': member.id, 'discord_name': member.name, 'is_admin': False}).execute()
-
-        logger.info('New user joined: %s (%s)', member.name, member.id)
-
-    async def _handle_message_action(self, actions: BotActions,
-                                     message: discord.Message) -> bool:
-        """
-        Perform a randomly selected action triggered by a message
-
-        Args:
-            actions: the `BotActions` to be performed
-            message: the `discord.Message` that triggered the action
-
-        Returns:
-            True if an action was performed; otherwise False
-        """
-
-        action_prob = actions.react_probability + \
-            actions.reply_probability + actions.image_probability
-        noop_prob = 100 - action_prob
-
-        # Determine what action should be taken: emoji react, text reply, noop
-        action = random.choices(
-            population=[BotClient._REACT_ACTION,
-                        BotClient._REPLY_ACTION,
-                        BotClient._IMAGE_ACTION, None],
-            weights=[actions.react_probability,
-                     actions.reply_probability,
-                     actions.image_probability, noop_prob],
-            k=1)[0]
-
-        if action is None:
-            return False
-
-        match action:
-            case BotClient._REACT_ACTION:
-                choice = random.choices(
-                    actions.reacts, actions.reaction_weights, k=1)[0]
-                await message.add_reaction(choice)
-            case BotClient._REPLY_ACTION:
-                choice = random.choices(
-                    actions.replies, actions.reply_weights, k=1)[0]
-
-                if self._true_replies:
-                    await message.reply(choice)
-                else:
-                    ctx = await self.get_context(message)
-                    await ctx.send(choice)
-            case BotClient._IMAGE_ACTION:
-                choice = random.choices(
-                    actions.images, actions.image_weights, k=1)[0]
-                await message.reply(file=discord.File(choice))
-            case _:
-                raise ValueError(f'Action {action} is not valid')
-
-        # Action occurred
-        return True
-
-    def _get_random_matching_role(
-            self, roles: List[discord.Role], role_ids: List[int]) -> int | None:
-        """
-        Get a randomly selected matching role if at least one exists between them
-
-        Args:
-            roles: a list of `discord.Role` that a user has
-            role_ids: a list of role IDs that have actions attributed to them
-
-        Returns:
-            A randomly selected matching role ID or None if no IDs match
-        """
-
-        entity_role_ids = [role.id for role in roles]
-        matching_roles = [id for id in role_ids if id in entity_role_ids]
-
-        if len(matching_roles) == 0:
-            return None
-
-        return random.choice(matching_roles)
-
-    def _get_action_for_message(self, lowered_message: str,
-                                action_group: Dict[str, BotActions]) -> BotActions | None:
-        """
-        Get the first relevant action from a processed action group based on message content. If no
-        relevant action is found, a `'GENERIC'` key is checked.
-
-        Args:
-            lowered_message: the message content as a str only containing lowercase characters
-            action_group: a dictionary mapping substrings to `BotActions`
-
-        Returns:
-            BotActions for the first matching substring found in `lowered_message`. None if no
-            substring is found or if there is no `'GENERIC'` key.
-        """
-
-        # Find actions matching text within the message
-        for text, actions in action_group.items():
-            if text in lowered_message:
-                return actions
-
-        # Check for generic actions
-        if 'GENERIC' in action_group:
-            return action_group['GENERIC']
-
-        return None
-
-    async def on_message(self, message: discord.Message) -> None:
-        """
-        Event handler: triggers when a messages is sent
-        """
-
-        if not self._is_event_valid(message.guild.id, message.channel.id, message.author):
-            return
-
-        # See if a command was called
-        ctx = await self.get_context(message)
-
-        if ctx.valid:
-            await self.process_commands(message)
-            return
-
-        if self._message_actions is None:
-            return
-
-        # Message did not contain a command; see if the author has user actions
-        user_id = message.author.id
-        uniform_content = message.content.lower()
-
-        if self._message_actions.user_actions is not None and \
-                user_id in self._message_actions.user_actions:
-            actions = self._get_action_for_message(uniform_content,
-                                                   self._message_actions.user_actions[user_id])
-
-            if actions is not None and await self._handle_message_action(actions, message):
-                return
-
-        # No user action performed; check role actions
-        if self._message_actions.role_actions is not None:
-            first_role_id = self._get_random_matching_role(
-                message.author.roles, self._message_actions.role_actions.keys())
-
-            # If not matching role ID was found, there are no other actions to perform
-            if first_role_id is None:
-                return
-
-            actions = self._get_action_for_message(
-                uniform_content, self._message_actions.role_actions[first_role_id])
-
-            if actions is not None and await self._handle_message_action(actions, message):
-                return
-
-    def _change_user_reputation(self, reactor: discord.Member,
-                                author: discord.Member, emoji: str) -> int | None:
-        """
-        Change the reputation of a user based on a reaction
-
-        Args:
-            reactor: the member who reacted to the message
-            author: the member who posted the message
-            emoji: the emoji that was reacted with
-
-        Returns:
-            The value of the reputation change or None if no action was performed
-        """
-
-        if reactor.id == author.id:
-            return None
-
-        # Check if the reactor has any user reputation changes
-        user_reactions = self._reaction_actions.user_actions.get(reactor.id, {})
-        actions = user_reactions.get(emoji, None)
-        rep_change = None if actions is None else actions.reputation_change
-
-        if rep_change is not None:
-            if not update_reputation(author.id, rep_change, self._supabase_client):
-                return None
-
-            return rep_change
-
-        # There were no user reputation changes; check role reputation changes
-        reactor_role = self._get_random_matching_role(
-            reactor.roles, self._reaction_actions.role_actions.keys())
-        role_reactions = self._reaction_actions.role_actions.get(reactor_role, {})
-        actions = role_reactions.get(emoji, None)
-        rep_change = None if actions is None else actions.reputation_change
-
-        if rep_change is None:
-            return None
-
-        if not update_reputation(author.id, actions.reputation_change, self._supabase_client):
-            return None
-
-        return rep_change
-
-    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
-        """
-        Event handler: handles emoji reactions being added to messages
-        """
-
-        if not self._is_event_valid(payload.guild_id, payload.channel_id, payload.member):
-            return
-
-        if self._reaction_actions is None:
-            return
-
-        channel = self.get_channel(payload.channel_id)
-        message = await channel.fetch_message(payload.message_id)
-
-        # Change message author's reputation if they aren't the sender
-        rep_change = self._change_user_reputation(
-            payload.member, message.author, payload.emoji.name)
-
-        if rep_change is not None:
-            await channel.send(f'{message.author.display_name} has been '
-                               f'{"awarded" if rep_change > 0 else "fined"} {abs(rep_change)} '
-                               'reputation points')
-
-        # Give user actions the opportunity to trigger
-        if self._reaction_actions.user_actions is not None and \
-                payload.member.id in self._reaction_actions.user_actions:
-
-            # Check if reaction emoji has relevant actions
-            emoji_actions = self._reaction_actions.user_actions[payload.member.id]
-            actions = emoji_actions.get(payload.emoji.name, None)
-
-            if actions is not None:
-                if await self._handle_message_action(actions, message):
-                    return
-
-        # No user action performed; check role actions
-        if self._reaction_actions.role_actions is not None:
-            first_role_id = self._get_random_matching_role(
-                payload.member.roles, self._reaction_actions.role_actions.keys())
-
-            # If not matching role ID was found, there are no other actions to perform
-            if first_role_id is None:
-                return
-
-            # Check if reaction emoji has relevant actions
-            emoji_actions = self._reaction_actions.role_actions[first_role_id]
-            actions = emoji_actions.get(payload.emoji.name, None)
-
-            if actions is not None:
-                if await self._handle_message_action(actions, message):
-                    return
+"""
+Bot Client
+
+Handles Discord sessions and contains code for the Bot's actions
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+import aiohttp
+import discord
+import supabase
+from discord.ext import commands
+
+# orjson is optional; the stdlib decoder is used when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from bot import sample_weighted
+from bot.config import (IMAGE_ACTION, REACT_ACTION, REPLY_ACTION, BotConfig, BotActions,
+                        CommandConfig, TriggerActionTable)
+from bot.minesweeper_view import MinesweeperView
+from bot.reputation import get_reputation, get_leaderboard, update_reputation
+
+logger = logging.getLogger('discord')
+
+# (threshold, divisor, unit) rows for time_description, checked in order; None matches any
+# remaining duration
+_UNITS = ((60, 1, 'second'), (3600, 60, 'minute'), (None, 3600, 'hour'))
+
+# Decoder handed to aiohttp's response.json(); orjson parses the ~8 KB YouTube payloads
+# several times faster than the stdlib
+_json_loads = json.loads if orjson is None else orjson.loads
+
+
+def time_description(seconds: int) -> str:
+    """
+    Get a string representing a very approximate description of a time in seconds.
+
+    Args:
+        seconds: the time to get a description for as an integer representing number of seconds
+
+    Returns:
+        A string approximately describing the time in seconds, minutes, or hours
+
+        Ex: 4000 seconds -> "about 1 hour"
+    """
+
+    for limit, divisor, unit in _UNITS:
+        if limit is None or seconds < limit:
+            adjusted_time = seconds // divisor
+            break
+
+    if adjusted_time > 1:
+        return f'about {adjusted_time} {unit}s'
+
+    return f'about {adjusted_time} {unit}'
+
+# TODO: Add Logging
+# TODO: Export bot functionality into cogs
+
+
+class BotClient(commands.Bot):
+    """
+    Bot and related Discord client session manager
+
+    All non-command callback functionality is implemented by overriding the corresponding default
+    implementation (i.e. on_ready()). The discord.py package will do all the hard work of handling
+    incoming events and Python's method resolution order (MRO) will handle the rest.
+
+    Command callbacks are created with the `Bot.command()` decorator. Because of this, new custom
+    commands can be added within __init__ itself.
+    """
+
+    # Action kinds drawn from BotActions.combined; aliased as class attributes so match
+    # patterns below stay dotted (a bare name in a case would be a capture pattern)
+    _REACT_ACTION = REACT_ACTION
+    _REPLY_ACTION = REPLY_ACTION
+    _IMAGE_ACTION = IMAGE_ACTION
+
+    # Number of reacted-to messages kept in the fetch cache
+    _REACTED_CACHE_SIZE = 256
+
+    # How long a fetched leaderboard may be served from memory, in seconds
+    _LB_CACHE_TTL = 30.0
+
+    # commands.Bot still carries a __dict__, so this doesn't shrink the instance, but the
+    # attributes listed here are reached through C-level slot descriptors instead of a dict
+    # lookup — and several of them are touched on every message and reaction
+    __slots__ = ('_guild_id', '_allowed_channels', '_true_replies', '_commands_config',
+                 '_message_actions', '_reaction_actions', '_supabase_url', '_supabase_key',
+                 '_supabase_client', '_google_api_key', '_cooldown_expiry', '_cooldown_heap', '_cooldown_counter',
+                 '_http', '_rep_queue', '_rep_drainer_task', '_uploads_cache',
+                 '_recent_reacted', '_rep_emojis_any_role', '_rep_emojis_by_user',
+                 '_lb_cache')
+
+    def __init__(self, config: BotConfig, supabase_url: str, supabase_key: str,
+                 google_api_key: str = None):
+        """
+        Create a new Bot session
+
+        Args:
+            config: a BotConfig describing how this session will behave
+            supabase_url: the URL of the Supabase database
+            supabase_key: the API key for the Supabase database
+            google_api_key: (Optional) the Google API key to enable !news commands, if None !news
+                becomes a no op; defaults to None
+        """
+
+        # Config
+        self._guild_id = config.guild
+        # Membership tests run on every event, so the channel list becomes a frozenset
+        self._allowed_channels = frozenset(config.allowed_channels)
+        self._true_replies = config.true_replies
+        self._commands_config = config.commands
+        self._message_actions = config.message_actions
+        self._reaction_actions = config.reaction_actions
+        self._supabase_url = supabase_url
+        self._supabase_key = supabase_key
+        self._supabase_client = None
+        self._google_api_key = google_api_key
+
+        # Active cooldowns, keyed by (command name, user id) with None as the user id for
+        # command-wide cooldowns. The dict gives O(1) lookups while the heap, ordered by
+        # expiry, lets expired entries be evicted opportunistically so neither structure
+        # grows with the guild's age. Heap entries carry a monotonically increasing counter
+        # so ties on expiry never fall through to comparing keys, whose user ids mix None
+        # and int and don't order
+        self._cooldown_expiry: Dict[tuple, float] = {}
+        self._cooldown_heap: List[tuple] = []
+        self._cooldown_counter = itertools.count()
+        self._http = None
+        self._rep_queue = None
+        self._rep_drainer_task = None
+
+        # Leaderboards are read far more often than they change; !lb serves from this
+        # (descending flag -> (fetch time, leaderboard)) cache inside the TTL, and the
+        # reputation drainer clears it whenever it flushes writes
+        self._lb_cache: Dict[bool, tuple] = {}
+
+        # A channel's uploads playlist essentially never changes, so steady-state !news only
+        # needs the playlistItems request
+        self._uploads_cache: Dict[str, str] = {}
+
+        # Messages fetched for reactions are kept in a small LRU so reaction bursts on the
+        # same message don't repeat the REST round-trip
+        self._recent_reacted: OrderedDict[int, discord.Message] = OrderedDict()
+
+        # Emoji that can change reputation, precomputed so reactions that can't possibly
+        # award anything skip the role scan in _change_user_reputation
+        self._rep_emojis_any_role = set()
+        self._rep_emojis_by_user = {}
+
+        if self._reaction_actions is not None:
+            if self._reaction_actions.role_actions is not None:
+                for emoji_actions in self._reaction_actions.role_actions.values():
+                    self._rep_emojis_any_role.update(
+                        emoji for emoji, actions in emoji_actions.items()
+                        if actions.reputation_change is not None)
+
+            if self._reaction_actions.user_actions is not None:
+                for reactor_id, emoji_actions in self._reaction_actions.user_actions.items():
+                    rep_emojis = {emoji for emoji, actions in emoji_actions.items()
+                                  if actions.reputation_change is not None}
+
+                    if rep_emojis:
+                        self._rep_emojis_by_user[reactor_id] = rep_emojis
+
+        # Set intents (basically a Discord bot's permissions and scopes) and create bot
+        intents = discord.Intents.default()
+
+        # pylint: disable=assigning-non-slot
+        intents.members = True
+        intents.message_content = True
+        # pylint: enable=assigning-non-slot
+
+        super().__init__(intents=intents, command_prefix='!')
+
+        self.add_check(self._global_check)
+
+        ###########################################################################################
+        # User commands                                                                           #
+        ###########################################################################################
+
+        @self.command(name='eightball', help='The Bot gifts you wisdom from beyond')
+        async def eightball(ctx):
+            """
+            User command: causes Bot to send a quote
+
+            TODO: Change config format to have roles/users by message rather than messages by
+            roles/users, right now we have a lot of repeats and it's a bit annoying
+            """
+
+            config = self._commands_config.get('eightball', None)
+
+            if config is None or not await self._is_caller_valid(ctx, config):
+                return
+
+            responses = []
+            response_weights = []
+
+            # Check for user response overrides
+            users = config.users
+
+            if users is not None:
+                user_responses = users.get(ctx.author.id, None)
+
+                if user_responses is not None:
+                    responses.append(random.choice(user_responses))
+                    response_weights.append(config.user_prob)
+
+            # Get role response
+            roles = config.roles
+
+            if roles is not None:
+                first_role_id = self._get_random_matching_role(ctx.author.roles, roles.keys())
+
+                if first_role_id is not None:
+                    responses.append(random.choice(roles[first_role_id]))
+                    response_weights.append(config.role_prob)
+
+            # Get generic response
+            if config.generic is not None:
+                responses.append(random.choice(config.generic))
+                response_weights.append(config.generic_prob)
+
+            await ctx.send(random.choices(responses, response_weights, k=1)[0])
+
+            self._set_cooldown(ctx.command.name, None, random.choice(config.cooldowns))
+
+        @self.command(name='news',
+                      help='The Bot sends you the latest in news and entertainment')
+        async def news(ctx):
+            """
+            User command: causes Bot to send the latest video from a random youtube channel
+            """
+
+            if self._google_api_key is None:
+                return
+
+            config = self._commands_config['news']
+
+            if config is None or not await self._is_caller_valid(ctx, config):
+                return
+
+            # Get the uploads playlist for a random youtube chanel
+            try:
+                uploads_id = await self._get_uploads_playlist(
+                    random.choice(config.youtube_channel_ids))
+            except aiohttp.ClientResponseError as err:
+                await ctx.send(f'Uploads playlist fetch recieved {err.status}')
+                return
+
+            # PlaylistItems.list to get most recent upload
+            playlist_items_payload = {
+                'part': 'contentDetails',
+                'playlistId': uploads_id,
+                'maxResults': '1',
+                'key': self._google_api_key
+            }
+
+            async with self._http.get('https://youtube.googleapis.com/youtube/v3/playlistItems',
+                                      params=playlist_items_payload) as playlist_items_list_r:
+                try:
+                    playlist_items_list_r.raise_for_status()
+                except aiohttp.ClientResponseError as err:
+                    await ctx.send(f'Latest upload fetch received {err.status}')
+                    return
+
+                playlist_items = await playlist_items_list_r.json(loads=_json_loads)
+
+            video_id = playlist_items['items'][0]['contentDetails']['videoId']
+
+            await ctx.send(f'https://youtube.com/watch?v={video_id}')
+
+            self._set_cooldown(ctx.command.name, None, random.choice(config.cooldowns))
+
+        @self.command(name='ms', help='Minesweeper: Find the mines!')
+        async def minesweeper(ctx, dimensions: int = 4, bombs: int = 3):
+            """
+            User command: create a minesweeper clone using Discord views and buttons
+            """
+
+            config = self._commands_config['ms']
+
+            if config is None or not await self._is_caller_valid(ctx, config):
+                return
+
+            if not 1 < dimensions <= 5:
+                await ctx.send(content='Invalid dimensions')
+                return
+
+            if not 0 < bombs <= dimensions ** 2:
+                await ctx.send(content='Invalid number of aircraft')
+                return
+
+            # Update cooldown
+            role_id = self._get_random_matching_role(ctx.author.roles,
+                                                     config.role_cooldown_ids)
+
+            if role_id is None:
+                cooldown_times = config.cooldowns
+            else:
+                cooldown_times = config.role_cooldowns[role_id]
+
+            expiry = self._set_cooldown(ctx.command.name, ctx.author.id,
+                                        random.choice(cooldown_times))
+
+            logger.info('Set cooldown for %s to %s', ctx.author.display_name, expiry)
+
+            # Setup game board initial state
+            embed = discord.Embed(
+                title=f'{ctx.author.display_name} must find the mines!',
+                color=discord.Color.blurple())
+            embed.add_field(name='Mines:', value=bombs)
+            embed.add_field(name='Moves:', value=0)
+
+            view = MinesweeperView(
+                board_dimension=dimensions,
+                num_bombs=bombs,
+                embed=embed,
+                user=ctx.author,
+                supabase_client=self._supabase_client)
+
+            await ctx.reply(view=view, embed=embed)
+            await view.wait()
+
+        @self.command(name='me', help='Check your reputation')
+        async def reputation_check(ctx):
+            """
+            User command: check your reputation
+
+            Args:
+                user_name: (Optional) the name of the user to check the reputation of; if not
+                    provided, the reputation of the caller will be checked
+            """
+
+            reputation = await get_reputation(ctx.author.id, self._supabase_client)
+
+            embed = discord.Embed(
+                title=f'{ctx.author.display_name}\'s Reputation',
+                color=discord.Color.blurple())
+            embed.add_field(name='Score:', value=reputation)
+
+            await ctx.reply(embed=embed)
+
+        @self.command(name='lb', help='Check the reputation leaderboard')
+        async def reputation_leaderboard(ctx, order: str = 't'):
+            """
+            User command: check the reputation leaderboard
+            """
+
+            order = order.lower()
+
+            if order not in ['b', 't']:
+                await ctx.reply('Invalid argument. Must be "b" or "t"')
+                return
+
+            descending = order == 't'
+            cached = self._lb_cache.get(descending, None)
+
+            if cached is not None and time.monotonic() - cached[0] < BotClient._LB_CACHE_TTL:
+                leaderboard = cached[1]
+            else:
+                leaderboard = await get_leaderboard(self._supabase_client, descending)
+
+                if leaderboard is None:
+                    return
+
+                self._lb_cache[descending] = (time.monotonic(), leaderboard)
+
+            embed = discord.Embed(
+                title=f'{"Honorable" if descending else "Shameful"} Leaderboard',
+                color=discord.Color.blurple())
+
+            for i, (user, rep) in enumerate(leaderboard):
+                embed.add_field(
+                    name=f'{i + 1}. {user}',
+                    value=f'Score: {rep}',
+                    inline=False)
+
+            await ctx.reply(embed=embed)
+
+    async def setup_hook(self):
+        """
+        Hook called by discord.py once the event loop is running but before the gateway connects
+        """
+
+        # The shared HTTP session is created here (not in __init__) so it binds to the running
+        # loop; requests through it never block the event loop the way requests.get did
+        self._http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+
+        # The async Supabase client keeps a pooled httpx.AsyncClient internally, so database
+        # calls reuse connections and await instead of stalling the event loop
+        self._supabase_client = await supabase.acreate_client(
+            self._supabase_url, self._supabase_key)
+
+        # Reputation changes from reactions are queued and coalesced off the hot path so a
+        # reaction burst doesn't serialize one database round-trip per reaction
+        self._rep_queue = asyncio.Queue()
+        self._rep_drainer_task = asyncio.create_task(self._rep_drainer())
+
+    async def close(self):
+        """
+        Close the Bot's Discord session along with its shared HTTP session
+
+        The reputation drainer is stopped first and any deltas still queued are flushed,
+        so a shutdown mid-burst doesn't drop earned reputation.
+        """
+
+        if self._rep_drainer_task is not None:
+            self._rep_drainer_task.cancel()
+
+            try:
+                await self._rep_drainer_task
+            except asyncio.CancelledError:
+                pass
+
+            deltas = {}
+
+            while not self._rep_queue.empty():
+                author_id, delta = self._rep_queue.get_nowait()
+                deltas[author_id] = deltas.get(author_id, 0) + delta
+
+            await self._flush_rep_deltas(deltas)
+
+        if self._http is not None:
+            await self._http.close()
+
+        await super().close()
+
+    async def _flush_rep_deltas(self, deltas: dict):
+        """
+        Apply a batch of per-author reputation deltas to the database
+
+        Each update is guarded individually: update_reputation only catches the database
+        API's own errors, so transport-level failures (connect errors, read timeouts)
+        would otherwise propagate and kill the drainer task for the rest of the session.
+
+        Args:
+            deltas: dictionary mapping author IDs to their summed reputation change
+        """
+
+        for author_id, total in deltas.items():
+            try:
+                if not await update_reputation(author_id, total, self._supabase_client):
+                    logger.error('Failed to apply batched reputation change of %s for %s',
+                                 total, author_id)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Error applying batched reputation change of %s for %s',
+                                 total, author_id)
+
+        if deltas:
+            # Scores changed, so cached leaderboards are stale
+            self._lb_cache.clear()
+
+    async def _rep_drainer(self):
+        """
+        Background task that batches queued reputation changes
+
+        Deltas are collected for up to 50 events or 100 ms, summed per author, and applied
+        with one database update per author instead of one per reaction. A batch collected
+        when the task is cancelled is still flushed before the cancellation propagates.
+        """
+
+        while True:
+            author_id, delta = await self._rep_queue.get()
+            deltas = {author_id: delta}
+            deadline = time.monotonic() + 0.1
+
+            try:
+                while len(deltas) < 50:
+                    timeout = deadline - time.monotonic()
+
+                    if timeout <= 0:
+                        break
+
+                    try:
+                        author_id, delta = await asyncio.wait_for(self._rep_queue.get(),
+                                                                  timeout)
+                    except asyncio.TimeoutError:
+                        break
+
+                    deltas[author_id] = deltas.get(author_id, 0) + delta
+            except asyncio.CancelledError:
+                await self._flush_rep_deltas(deltas)
+                raise
+
+            await self._flush_rep_deltas(deltas)
+
+    async def _get_uploads_playlist(self, channel_id: str) -> str:
+        """
+        Get the uploads playlist ID for a youtube channel, caching results
+
+        Args:
+            channel_id: the youtube channel ID to look up
+
+        Returns:
+            The channel's uploads playlist ID
+
+        Raises:
+            aiohttp.ClientResponseError: if the YouTube API request fails
+        """
+
+        uploads_id = self._uploads_cache.get(channel_id, None)
+
+        if uploads_id is not None:
+            return uploads_id
+
+        channel_payload = {
+            'part': 'contentDetails',
+            'id': channel_id,
+            'maxResults': '1',
+            'key': self._google_api_key
+        }
+
+        async with self._http.get('https://youtube.googleapis.com/youtube/v3/channels',
+                                  params=channel_payload) as channel_list_r:
+            channel_list_r.raise_for_status()
+            channel_list = await channel_list_r.json(loads=_json_loads)
+
+        uploads_id = channel_list['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+        self._uploads_cache[channel_id] = uploads_id
+
+        return uploads_id
+
+    async def _global_check(self, ctx) -> bool:
+        """
+        Global check for commands to make sure they are called from an allowed guild or channel
+
+        Args:
+            ctx: the command's context
+
+        Returns:
+            True if the command was called from the configured guild and an allowed channel
+        """
+
+        return ctx.guild.id == self._guild_id and ctx.channel.id in self._allowed_channels
+
+    async def _is_caller_valid(self, ctx, command_config: CommandConfig) -> bool:
+        """
+        Verify that a caller for a command is valid and that no cooldown is currently active
+
+        Args:
+            ctx: the command's context
+            command_config: the command's `CommandConfig`
+
+        Returns:
+            True if caller is valid; False otherwise
+        """
+
+        if not command_config.enabled or ctx.author.id in command_config.restricted_users:
+            return False
+
+        restricted_role = self._get_random_matching_role(
+            ctx.author.roles, command_config.restricted_roles)
+
+        if restricted_role is not None:
+            await ctx.send(f'Try again in about {random.randint(2, 30)} '
+                           f'{random.choice(["weeks", "months", "years"])}')
+            return False
+
+        # The clock is read once per call; monotonic is a touch cheaper than time.time and
+        # immune to wall-clock adjustments, which matters for stored deadlines
+        now = time.monotonic()
+        self._evict_expired_cooldowns(now)
+
+        # User cooldowns take precedence over the command-wide one, so a user with an active
+        # cooldown can't use the command even if the command-wide cooldown has expired. Since
+        # eviction just ran, any entry still present is active.
+        cooldown_time = self._cooldown_expiry.get((ctx.command.name, ctx.author.id), None)
+
+        if cooldown_time is None:
+            cooldown_time = self._cooldown_expiry.get((ctx.command.name, None), None)
+
+        if cooldown_time is not None:
+            if random.randint(0, 100) < command_config.cooldown_message_prob:
+                time_desc = time_description(int(cooldown_time - now))
+                await ctx.send(f'{random.choice(command_config.cooldown_messages)}\n'
+                               f'Try again in {time_desc}')
+            return False
+
+        return True
+
+    def _set_cooldown(self, command_name: str, user_id: int | None, duration: int) -> float:
+        """
+        Start a cooldown for a command
+
+        Args:
+            command_name: the name of the command to cool down
+            user_id: the user the cooldown applies to, or None for a command-wide cooldown
+            duration: the cooldown length in seconds
+
+        Returns:
+            The expiry deadline of the new cooldown on the `time.monotonic` clock
+        """
+
+        expiry = time.monotonic() + duration
+        key = (command_name, user_id)
+
+        self._cooldown_expiry[key] = expiry
+        heapq.heappush(self._cooldown_heap, (expiry, next(self._cooldown_counter), key))
+
+        return expiry
+
+    def _evict_expired_cooldowns(self, now: float) -> None:
+        """
+        Pop expired cooldowns off the heap and drop them from the expiry dict
+
+        Re-setting a cooldown leaves its old heap entry behind, so dict entries are only
+        removed when their expiry matches the popped one.
+
+        Args:
+            now: the current `time.monotonic` reading
+        """
+
+        while self._cooldown_heap and self._cooldown_heap[0][0] <= now:
+            expiry, _, key = heapq.heappop(self._cooldown_heap)
+
+            if self._cooldown_expiry.get(key, None) == expiry:
+                del self._cooldown_expiry[key]
+
+    ###############################################################################################
+    # Event handlers                                                                              #
+    ###############################################################################################
+
+    async def on_ready(self):
+        """
+        Event handler: triggered by a successful websocket connection
+        """
+
+        logger.info('%s has connected to Discord!', self.user.name)
+
+        # TODO: Multi-guild support and scope select by guild
+        user_rows = [{'discord_id': member.id, 'discord_name': member.name, 'is_admin': False}
+                     for member in self.guilds[0].members if not member.bot]
+
+        # Upserting with ignore_duplicates makes existing members a server-side no-op, so no
+        # read of the whole users table is needed to diff them client-side; chunking keeps
+        # individual requests reasonable on huge guilds
+        added = 0
+
+        for start in range(0, len(user_rows), 500):
+            res = await self._supabase_client.table('users').upsert(
+                user_rows[start:start + 500], on_conflict='discord_id',
+                ignore_duplicates=True).execute()
+            added += len(res.data)
+
+        logger.info('Added %s users to the database', added)
+
+        # Warm the uploads-playlist cache concurrently so the first !news for each channel
+        # doesn't pay for the extra channels.list round-trip
+        news_config = self._commands_config.get('news', None)
+
+        if self._google_api_key is not None and news_config is not None:
+            await asyncio.gather(
+                *[self._get_uploads_playlist(channel_id)
+                  for channel_id in news_config.youtube_channel_ids
+                  if channel_id not in self._uploads_cache],
+                return_exceptions=True)
+
+    async def on_member_join(self, member: discord.Member):
+        """
+        Event handler: triggered when a new user joins the guild
+
+        Args:
+            member: the `discord.Member` that joined
+        """
+
+        if member.bot:
+            return
+
+        await self._supabase_client.table('users').insert(
+            {'discord_id': member.id, 'discord_name': member.name, 'is_admin': False}).execute()
+
+        logger.info('New user joined: %s (%s)', member.name, member.id)
+
+    async def _handle_message_action(self, actions: BotActions,
+                                     message: discord.Message) -> bool:
+        """
+        Perform a randomly selected action triggered by a message
+
+        Args:
+            actions: the `BotActions` to be performed
+            message: the `discord.Message` that triggered the action
+
+        Returns:
+            True if an action was performed; otherwise False
+        """
+
+        if actions.combined is None:
+            return False
+
+        # One draw from the combined table decides both the action kind (react, reply,
+        # image, noop) and the payload; the flat distribution was built at config load
+        action, choice = sample_weighted(actions.combined)
+
+        if action is None:
+            return False
+
+        match action:
+            case BotClient._REACT_ACTION:
+                await message.add_reaction(choice)
+            case BotClient._REPLY_ACTION:
+                if self._true_replies:
+                    await message.reply(choice)
+                else:
+                    ctx = await self.get_context(message)
+                    await ctx.send(choice)
+            case BotClient._IMAGE_ACTION:
+                await message.reply(file=discord.File(choice))
+            case _:
+                raise ValueError(f'Action {action} is not valid')
+
+        # Action occurred
+        return True
+
+    def _get_random_matching_role(
+            self, roles: List[discord.Role], role_ids: Iterable[int]) -> int | None:
+        """
+        Get a randomly selected matching role if at least one exists between them
+
+        Args:
+            roles: a list of `discord.Role` that a user has
+            role_ids: role IDs that have actions attributed to them
+
+        Returns:
+            A randomly selected matching role ID or None if no IDs match
+        """
+
+        # A set intersection is O(N + M) rather than the O(N * M) of scanning one list per
+        # entry of the other; this runs on every message and reaction
+        matching_roles = set(role_ids).intersection(role.id for role in roles)
+
+        if not matching_roles:
+            return None
+
+        return random.choice(tuple(matching_roles))
+
+    def _get_action_for_message(self, lowered_message: str,
+                                action_group: TriggerActionTable) -> BotActions | None:
+        """
+        Get the first relevant action from a processed action group based on message content. If no
+        relevant action is found, a `'GENERIC'` key is checked.
+
+        Args:
+            lowered_message: the message content as a str only containing lowercase characters
+            action_group: a `TriggerActionTable` mapping substrings to `BotActions`
+
+        Returns:
+            BotActions for the first matching substring found in `lowered_message`. None if no
+            substring is found or if there is no `'GENERIC'` key.
+        """
+
+        # Find actions matching text within the message; the precompiled automaton scans the
+        # message once, the fallback tests each trigger separately
+        if action_group.automaton is not None:
+            for _, actions in action_group.automaton.iter(lowered_message):
+                return actions
+        else:
+            for text, actions in action_group.items():
+                if text != 'GENERIC' and text in lowered_message:
+                    return actions
+
+        # Check for generic actions
+        if 'GENERIC' in action_group:
+            return action_group['GENERIC']
+
+        return None
+
+    async def on_message(self, message: discord.Message) -> None:
+        """
+        Event handler: triggers when a messages is sent
+        """
+
+        # Inlined validity checks, cheapest and most-frequently-failing first: other bots'
+        # messages are the highest-volume non-work case
+        author = message.author
+
+        if author.bot or author.id == self.user.id or message.guild.id != self._guild_id \
+                or message.channel.id not in self._allowed_channels:
+            return
+
+        # See if a command was called
+        ctx = await self.get_context(message)
+
+        if ctx.valid:
+            await self.process_commands(message)
+            return
+
+        if self._message_actions is None:
+            return
+
+        # Message did not contain a command; see if the author has user actions. Lowering the
+        # content copies the whole message, so it only happens once an action table actually
+        # needs to be matched against
+        user_id = message.author.id
+        uniform_content = None
+
+        if self._message_actions.user_actions is not None and \
+                user_id in self._message_actions.user_actions:
+            uniform_content = message.content.lower()
+            actions = self._get_action_for_message(uniform_content,
+                                                   self._message_actions.user_actions[user_id])
+
+            if actions is not None and await self._handle_message_action(actions, message):
+                return
+
+        # No user action performed; check role actions
+        if self._message_actions.role_actions is not None:
+            first_role_id = self._get_random_matching_role(
+                message.author.roles, self._message_actions.role_actions.keys())
+
+            # If not matching role ID was found, there are no other actions to perform
+            if first_role_id is None:
+                return
+
+            if uniform_content is None:
+                uniform_content = message.content.lower()
+
+            actions = self._get_action_for_message(
+                uniform_content, self._message_actions.role_actions[first_role_id])
+
+            if actions is not None and await self._handle_message_action(actions, message):
+                return
+
+    def _change_user_reputation(self, reactor: discord.Member,
+                                author: discord.Member, emoji: str) -> int | None:
+        """
+        Change the reputation of a user based on a reaction
+
+        The change is queued for the background drainer task rather than written immediately,
+        so a burst of reactions costs one coalesced database update per author instead of one
+        round-trip per reaction.
+
+        Args:
+            reactor: the member who reacted to the message
+            author: the member who posted the message
+            emoji: the emoji that was reacted with
+
+        Returns:
+            The value of the reputation change or None if no action was performed
+        """
+
+        if reactor.id == author.id:
+            return None
+
+        # Most emoji can't change reputation for anyone; skip the per-reaction lookups and
+        # role scan for those
+        if emoji not in self._rep_emojis_any_role and \
+                emoji not in self._rep_emojis_by_user.get(reactor.id, ()):
+            return None
+
+        # Check if the reactor has any user reputation changes
+        user_reactions = self._reaction_actions.user_actions.get(reactor.id, {})
+        actions = user_reactions.get(emoji, None)
+        rep_change = None if actions is None else actions.reputation_change
+
+        if rep_change is None:
+            # There were no user reputation changes; check role reputation changes
+            reactor_role = self._get_random_matching_role(
+                reactor.roles, self._reaction_actions.role_actions.keys())
+            role_reactions = self._reaction_actions.role_actions.get(reactor_role, {})
+            actions = role_reactions.get(emoji, None)
+            rep_change = None if actions is None else actions.reputation_change
+
+        if rep_change is None:
+            return None
+
+        self._rep_queue.put_nowait((author.id, rep_change))
+
+        return rep_change
+
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        """
+        Event handler: handles emoji reactions being added to messages
+        """
+
+        # Inlined validity checks, cheapest and most-frequently-failing first (see on_message).
+        # member is None for reactions outside a guild (DMs), which the guild check below
+        # would reject anyway, so treat it as an early rejection rather than dereferencing it
+        member = payload.member
+
+        if member is None or member.bot or member.id == self.user.id \
+                or payload.guild_id != self._guild_id \
+                or payload.channel_id not in self._allowed_channels:
+            return
+
+        if self._reaction_actions is None:
+            return
+
+        channel = self.get_channel(payload.channel_id)
+
+        # Check our own LRU and the library's message cache before paying for a REST fetch
+        message = self._recent_reacted.get(payload.message_id, None)
+
+        if message is None:
+            message = discord.utils.get(self.cached_messages, id=payload.message_id)
+
+        if message is None:
+            message = await channel.fetch_message(payload.message_id)
+
+        self._recent_reacted[payload.message_id] = message
+        self._recent_reacted.move_to_end(payload.message_id)
+
+        if len(self._recent_reacted) > BotClient._REACTED_CACHE_SIZE:
+            self._recent_reacted.popitem(last=False)
+
+        # Change message author's reputation if they aren't the sender
+        rep_change = self._change_user_reputation(
+            payload.member, message.author, payload.emoji.name)
+
+        if rep_change is not None:
+            await channel.send(f'{message.author.display_name} has been '
+                               f'{"awarded" if rep_change > 0 else "fined"} {abs(rep_change)} '
+                               'reputation points')
+
+        # Give user actions the opportunity to trigger
+        if self._reaction_actions.user_actions is not None and \
+                payload.member.id in self._reaction_actions.user_actions:
+
+            # Check if reaction emoji has relevant actions
+            emoji_actions = self._reaction_actions.user_actions[payload.member.id]
+            actions = emoji_actions.get(payload.emoji.name, None)
+
+            if actions is not None:
+                if await self._handle_message_action(actions, message):
+                    return
+
+        # No user action performed; check role actions
+        if self._reaction_actions.role_actions is not None:
+            first_role_id = self._get_random_matching_role(
+                payload.member.roles, self._reaction_actions.role_actions.keys())
+
+            # If not matching role ID was found, there are no other actions to perform
+            if first_role_id is None:
+                return
+
+            # Check if reaction emoji has relevant actions
+            emoji_actions = self._reaction_actions.role_actions[first_role_id]
+            actions = emoji_actions.get(payload.emoji.name, None)
+
+            if actions is not None:
+                if await self._handle_message_action(actions, message):
+                    return
@@ -4,37 +4,97 @@ Bot Config
 Handles config parsing
 """
 
+from __future__ import annotations
+
 import json
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, cast
+
+from bot import (IMAGE_PROBABILITY, IMAGES, REACT_PROBABILITY, REACTIONS, REPLIES,
+                 REPLY_PROBABILITY, REPUTATION_CHANGE, ROLES, USERS, WeightedTable,
+                 compile_weighted, validate_action_group)
+
+# pyahocorasick is optional; without it trigger matching falls back to a linear substring scan
+try:
+    import ahocorasick  # type: ignore[import-not-found]
+except ImportError:
+    ahocorasick = None
+
+# orjson is optional; the stdlib parser handles the config when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+# Action kinds appearing in BotActions.combined labels; BotClient dispatches on these
+REACT_ACTION = 0
+REPLY_ACTION = 1
+IMAGE_ACTION = 2
+
+# Label drawn when the combined table decides no action should happen
+_NOOP_LABEL = (None, None)
 
-from bot import EntityTypeIDs, TriggerActionGroups, WeightedActions
+if TYPE_CHECKING:
+    from bot import EntityTypeIDs, TriggerActionGroups, WeightedActions
 
+# Identical weighted-action bundles show up across many triggers (shared reply lists and
+# the like); compiling each distinct bundle once and sharing the WeightedTable keeps memory
+# at O(unique bundles) instead of O(triggers)
+_WEIGHTED_CACHE: Dict[tuple, WeightedTable] = {}
 
-@dataclass
+
+def _compile_weighted_cached(actions: dict[Any, int]) -> WeightedTable:
+    """
+    Compile a weighted-actions dict, reusing the table from any earlier identical dict
+
+    Args:
+        actions: a `WeightedActions`-shaped dictionary mapping labels to weights
+
+    Returns:
+        The compiled (and possibly shared) `WeightedTable`
+    """
+
+    key = tuple(actions.items())
+    table = _WEIGHTED_CACHE.get(key, None)
+
+    if table is None:
+        table = compile_weighted(actions)
+        _WEIGHTED_CACHE[key] = table
+
+    return table
+
+
+@dataclass(slots=True)
 class BotActions:
     """
     Actions the Bot may perform when an event occurs
     """
 
-    # Actions and their weights are separate since the decision logic is based on random.choices
-    # which expects two lists, one of a sample population and another of its weights
+    # Each action category is a compiled WeightedTable (labels plus running weight totals)
+    # so per-event draws are a single bisect (see bot.sample_weighted)
     react_probability: int | None = None
-    reacts: List[str] | None = None
-    reaction_weights: List[int] | None = None
+    reactions: WeightedTable | None = None
 
     reply_probability: int | None = None
-    replies: List[str] | None = None
-    reply_weights: List[int] | None = None
+    replies: WeightedTable | None = None
 
     image_probability: int | None = None
-    images: List[str] | None = None
-    image_weights: List[int] | None = None
+    images: WeightedTable | None = None
 
     reputation_change: int | None = None
 
+    # Single flat distribution over ((action_kind, payload), weight) pairs combining the
+    # category probabilities with their payload weights, so one draw decides both what to do
+    # and what to send; None when the trigger performs no actions
+    combined: WeightedTable | None = None
+
 
-@dataclass
+# Shared instance for triggers whose probabilities are all zero and that change no
+# reputation; configs with many dormant triggers get one object instead of one per trigger
+_EMPTY_ACTIONS = BotActions()
+
+
+@dataclass(slots=True)
 class BotEntityActions:
     """
     Group of user and role-dependent Bot actions for different trigger phrases or reaction emoji
@@ -47,8 +107,93 @@ class BotEntityActions:
             corresponding actions; defaults to None
     """
 
-    user_actions: Dict[int, Dict[str, BotActions]] | None = None
-    role_actions: Dict[int, Dict[str, BotActions]] | None = None
+    user_actions: Dict[int, 'TriggerActionTable'] | None = None
+    role_actions: Dict[int, 'TriggerActionTable'] | None = None
+
+
+class TriggerActionTable(Dict[str, BotActions]):
+    """
+    Mapping of trigger phrases/emojis to their `BotActions`
+
+    When pyahocorasick is installed, the message triggers (everything but `'GENERIC'`) are
+    also compiled into an Aho-Corasick automaton at config load so a message is matched in
+    one linear scan instead of one substring test per trigger.
+    """
+
+    __slots__ = ('automaton',)
+
+    def __init__(self, actions: Dict[str, BotActions]):
+        super().__init__(actions)
+
+        self.automaton = None
+        triggers = [trigger for trigger in actions if trigger != 'GENERIC']
+
+        if ahocorasick is not None and triggers:
+            automaton = ahocorasick.Automaton()
+
+            for trigger in triggers:
+                automaton.add_word(trigger, actions[trigger])
+
+            automaton.make_automaton()
+            self.automaton = automaton
+
+
+@dataclass(slots=True)
+class CommandConfig:
+    """
+    Settings shared by every user command
+
+    Commands consult their config on each invocation, so the JSON dicts are parsed into
+    slotted dataclasses once at load time; attribute access is noticeably cheaper than the
+    chain of dict lookups it replaces.
+    """
+
+    enabled: bool = True
+    restricted_users: frozenset = frozenset()
+    restricted_roles: tuple = ()
+    cooldowns: tuple = ()
+    cooldown_message_prob: int = 0
+    cooldown_messages: tuple = ()
+
+
+@dataclass(slots=True)
+class EightballConfig(CommandConfig):
+    """
+    Settings for the !eightball command
+
+    The response dicts are keyed by int Discord IDs and the category probabilities are
+    hoisted out of their nested JSON objects.
+    """
+
+    users: Dict[int, list] | None = None
+    roles: Dict[int, list] | None = None
+    generic: list | None = None
+    user_prob: int = 0
+    role_prob: int = 0
+    generic_prob: int = 0
+
+
+@dataclass(slots=True)
+class NewsConfig(CommandConfig):
+    """
+    Settings for the !news command
+    """
+
+    youtube_channel_ids: tuple = ()
+
+
+@dataclass(slots=True)
+class MsConfig(CommandConfig):
+    """
+    Settings for the !ms command
+
+    Role cooldowns are keyed by int Discord IDs with their JSON `[start, stop]` bounds
+    expanded to ranges, and the role IDs are kept as a prebuilt tuple for the matching-role
+    scan, so the command avoids per-call conversions.
+    """
+
+    role_cooldowns: Dict[int, range] = field(default_factory=dict)
+    role_cooldown_ids: tuple = ()
 
 
 class BotConfig:
@@ -56,6 +201,12 @@ class BotConfig:
     Bot's interface for the config file
     """
 
+    # Declared but left unset by __init__; __getattr__ fills them on first access. Declaring
+    # them (rather than writing into self.__dict__) keeps the cache working under the mypyc
+    # build, whose native instances have no __dict__
+    message_actions: 'BotEntityActions | None'
+    reaction_actions: 'BotEntityActions | None'
+
     def __init__(self, config_path: str):
         """
         Create a new `BotConfig` instance
@@ -64,25 +215,110 @@ class BotConfig:
             config_path: the path to the config file to process
         """
 
-        with open(config_path, 'r', encoding='utf-8') as handle:
-            config = json.load(handle)
+        # The file is read as bytes so orjson's SIMD parser can be used when available;
+        # json.loads accepts bytes too, so the fallback shares the path
+        with open(config_path, 'rb') as handle:
+            raw_config = handle.read()
+
+        config = json.loads(raw_config) if orjson is None else orjson.loads(raw_config)
 
         # Process mandatory config
         self.guild = config['guild']
         self.allowed_channels = config['allowed_channels']
         self.true_replies = config['true_replies']
-        self.commands = config['commands']
+        self.commands = {name: BotConfig._process_command_config(name, command_config)
+                         for name, command_config in config['commands'].items()}
+
+        # Message and reaction action groups are processed lazily (see __getattr__), so a
+        # session that never touches one of them doesn't pay to compile its user/role trees
+        self._raw_message_actions = config.get('message_actions', None)
+        self._raw_reaction_actions = config.get('reaction_actions', None)
 
-        # Process message and reaction action groups
-        self.message_actions = None
-        self.reaction_actions = None
+    # Sections compiled on first attribute access instead of in __init__
+    _LAZY_SECTIONS: ClassVar[tuple] = ('message_actions', 'reaction_actions')
 
-        if 'message_actions' in config:
-            self.message_actions = self._process_entity_actions(
-                config['message_actions'])
-        if 'reaction_actions' in config:
-            self.reaction_actions = self._process_entity_actions(
-                config['reaction_actions'])
+    def __getattr__(self, name: str):
+        """
+        Compile an action section on first access and cache the result
+
+        The processed `BotEntityActions` (or None when the section is absent) is assigned to
+        the declared instance attribute, so later accesses bypass this hook entirely.
+
+        Args:
+            name: the attribute being looked up
+
+        Returns:
+            The processed section for names in `_LAZY_SECTIONS`
+
+        Raises:
+            AttributeError: for any other missing attribute
+        """
+
+        if name in BotConfig._LAZY_SECTIONS:
+            raw_section = getattr(self, f'_raw_{name}')
+            processed = None if raw_section is None else self._process_entity_actions(raw_section)
+            setattr(self, name, processed)
+
+            return processed
+
+        raise AttributeError(
+            f'{type(self).__name__!r} object has no attribute {name!r}')
+
+    @staticmethod
+    def _process_command_config(name: str, command_config: dict) -> CommandConfig:
+        """
+        Parse one command's JSON object into its `CommandConfig` dataclass
+
+        Args:
+            name: the command's name (its key under `'commands'`)
+            command_config: the command's raw JSON dictionary
+
+        Returns:
+            A `CommandConfig` (or command-specific subclass) holding the parsed settings
+        """
+
+        base = {
+            'enabled': command_config.get('enabled', True),
+            'restricted_users': frozenset(command_config.get('restricted_users', ())),
+            'restricted_roles': tuple(command_config.get('restricted_roles', ())),
+            'cooldowns': tuple(command_config.get('cooldowns', ())),
+            'cooldown_message_prob': command_config.get('cooldown_message_prob', 0),
+            'cooldown_messages': tuple(command_config.get('cooldown_messages', ())),
+        }
+
+        if name == 'eightball':
+            actions = command_config.get('actions', {})
+            probabilities = command_config.get('response_category_probability', {})
+
+            users = actions.get(USERS, None)
+            roles = actions.get(ROLES, None)
+
+            # Responses are indexed by Discord IDs; converting the JSON string keys to int
+            # once lets the command look up author/role snowflakes without per-call casts
+            return EightballConfig(
+                **base,
+                users=None if users is None else {int(user_id): responses
+                                                  for user_id, responses in users.items()},
+                roles=None if roles is None else {int(role_id): responses
+                                                  for role_id, responses in roles.items()},
+                generic=actions.get('GENERIC', None),
+                user_prob=probabilities.get('user', 0),
+                role_prob=probabilities.get('role', 0),
+                generic_prob=probabilities.get('generic', 0))
+
+        if name == 'news':
+            return NewsConfig(**base, youtube_channel_ids=tuple(
+                command_config.get('youtube_channel_ids', ())))
+
+        if name == 'ms':
+            role_cooldowns = {int(role_id): range(*bounds)
+                              for role_id, bounds
+                              in command_config.get('role_cooldowns', {}).items()}
+
+            return MsConfig(**base, role_cooldowns=role_cooldowns,
+                            role_cooldown_ids=tuple(role_cooldowns.keys()))
+
+        return CommandConfig(**base)
 
     @staticmethod
     def _process_entity_actions(entity_types: EntityTypeIDs) -> BotEntityActions:
@@ -97,40 +333,61 @@ class BotConfig:
         """
 
         user_actions = {}
-        if 'users' in entity_types:
-            for user_id, trigger_actions in entity_types['users'].items():
+        if USERS in entity_types:
+            for user_id, trigger_actions in entity_types[USERS].items():
                 user_actions[int(user_id)] = BotConfig._process_trigger_action_groups(
                     trigger_actions)
 
         role_actions = {}
-        if 'roles' in entity_types:
-            for role_id, trigger_actions in entity_types['roles'].items():
+        if ROLES in entity_types:
+            for role_id, trigger_actions in entity_types[ROLES].items():
                 role_actions[int(role_id)] = BotConfig._process_trigger_action_groups(
                     trigger_actions)
 
         return BotEntityActions(user_actions, role_actions)
 
     @staticmethod
-    def _get_weighted_actions(actions: WeightedActions) -> Tuple[List[str], List[int]]:
+    def _compile_combined(categories) -> WeightedTable | None:
         """
-        Given a `WeightedActions` dictionary, process actions and their weights and return them as
-        two lists within a tuple
+        Flatten per-category probabilities and their payload weights into one weighted map
+        over `(action_kind, payload)` pairs, so a single draw decides both
+
+        Since each category's payload weights add up to 100, scaling them by the category
+        probability keeps all categories on the same footing; the noop residual is weighted
+        to match.
 
         Args:
-            actions: A `WeightedActions` dictionary
+            categories: an iterable of `(action_kind, probability, WeightedActions | None)`
+                tuples
 
         Returns:
-            A tuple containing two lists `(actions, weights)`
+            A `WeightedTable` over `(action_kind, payload)` labels, or None if no category
+            has both a probability and payloads
         """
 
-        processed_actions = list(actions.keys())
-        processed_action_weights = list(actions.values())
+        combined = {}
+        action_prob = 0
+
+        for action_kind, probability, weighted_actions in categories:
+            action_prob += probability
+
+            if probability and weighted_actions:
+                for payload, weight in weighted_actions.items():
+                    combined[(action_kind, payload)] = probability * weight
 
-        return processed_actions, processed_action_weights
+        if not combined:
+            return None
+
+        noop_prob = 100 - action_prob
+
+        if noop_prob:
+            combined[_NOOP_LABEL] = noop_prob * 100
+
+        return _compile_weighted_cached(combined)
 
     @staticmethod
     def _process_trigger_action_groups(
-            trigger_action_groups: TriggerActionGroups) -> Dict[str, BotActions]:
+            trigger_action_groups: TriggerActionGroups) -> TriggerActionTable:
         """
         Process `TriggerActionGroups` by creating `BotActions` objects for each trigger
 
@@ -138,50 +395,61 @@ class BotConfig:
             trigger_action_groups: A `TriggerActionGroups` dictionary
 
         Returns:
-            A dictionary where each key is a trigger and each value is its corresponding
-            `BotActions` object
+            A `TriggerActionTable` where each key is a trigger and each value is its
+            corresponding `BotActions` object
         """
 
         processed_actions = {}
         for trigger, action_group in trigger_action_groups.items():
+            validate_action_group(trigger, action_group)
+
+            # One bound method saves a LOAD_METHOD dispatch per key below, which adds up
+            # when a config defines thousands of triggers
+            get = action_group.get
+
+            # The casts restore the value types the ActionGroup keys are declared with;
+            # TypedDict lookups through variable keys type as plain object
+            react_prob, reply_prob, image_prob = (cast(int, get(REACT_PROBABILITY, 0)),
+                                                  cast(int, get(REPLY_PROBABILITY, 0)),
+                                                  cast(int, get(IMAGE_PROBABILITY, 0)))
+
             # Process emoji reactions
             # TODO: support custom emoji
-            react_prob = action_group.get('react_probability', 0)
-            react_actions = action_group.get('reactions', None)
-            reacts, react_weights = None, None
-
-            if react_actions is not None:
-                reacts, react_weights = BotConfig._get_weighted_actions(react_actions)
+            react_actions = cast('WeightedActions | None', get(REACTIONS, None))
+            reactions = None if react_actions is None else _compile_weighted_cached(react_actions)
 
             # Process text responses
-            reply_prob = action_group.get('reply_probability', 0)
-            reply_actions = action_group.get('replies', None)
-            replies, reply_weights = None, None
-
-            if reply_actions is not None:
-                replies, reply_weights = BotConfig._get_weighted_actions(reply_actions)
+            reply_actions = cast('WeightedActions | None', get(REPLIES, None))
+            replies = None if reply_actions is None else _compile_weighted_cached(reply_actions)
 
             # Process image responses
-            image_prob = action_group.get('image_probability', 0)
-            image_actions = action_group.get('images', None)
-            images, image_weights = None, None
-
-            if image_actions is not None:
-                images, image_weights = BotConfig._get_weighted_actions(image_actions)
+            image_actions = cast('WeightedActions | None', get(IMAGES, None))
+            images = None if image_actions is None else _compile_weighted_cached(image_actions)
 
             if react_prob + reply_prob + image_prob > 100:
                 raise ValueError(f'Sum of action probabilities for trigger {trigger} must '
                                  'equal 100')
 
-            rep_change = action_group.get('reputation_change', None)
+            combined = BotConfig._compile_combined(
+                ((REACT_ACTION, react_prob, react_actions),
+                 (REPLY_ACTION, reply_prob, reply_actions),
+                 (IMAGE_ACTION, image_prob, image_actions)))
+
+            rep_change = cast('int | None', get(REPUTATION_CHANGE, None))
+
+            # Dormant triggers (nothing to do, nothing to award) all share the empty
+            # singleton; the handlers' existing None checks make them an early no-op
+            if combined is None and rep_change is None:
+                processed_actions[trigger] = _EMPTY_ACTIONS
+                continue
 
             # This doesn't really need to be it's own class, in fact performance-wise it would be
             # slightly better to just make this a dict without all the sugar a class adds, but I
             # like using intellisense so 🤷‍♂️
             processed_actions[trigger] = BotActions(
-                react_prob, reacts, react_weights,
-                reply_prob, replies, reply_weights,
-                image_prob, images, image_weights,
-                rep_change)
+                react_prob, reactions,
+                reply_prob, replies,
+                image_prob, images,
+                rep_change, combined)
 
-        return processed_actions
+        return TriggerActionTable(processed_actions)
@@ -101,43 +101,42 @@ class Board:
 
         return num_neighboring_bombs
 
-    def dig(self, row, col):
+    def dig(self, row, col, revealed=None):
         # dig at that location!
-        # return True if successful dig, False if bomb dug
+        # return (safe, revealed): safe is False if a bomb was dug, and revealed collects
+        # every (row, col) this dig newly uncovered so callers can update just those cells
 
         # a few scenarios:
         # hit a bomb -> game over
         # dig at location with neighboring bombs -> finish dig
         # dig at location with no neighboring bombs -> recursively dig neighbors!
 
+        if revealed is None:
+            revealed = []
+
         self.dug.add((row, col))  # keep track that we dug here
+        revealed.append((row, col))
 
         if self.board[row][col] == '*':
-            return False
+            return False, revealed
         elif self.board[row][col] > 0:
-            return True
+            return True, revealed
 
         # self.board[row][col] == 0
         for r in range(max(0, row - 1), min(self.dim_size - 1, row + 1) + 1):
             for c in range(max(0, col - 1), min(self.dim_size - 1, col + 1) + 1):
                 if (r, c) in self.dug:
                     continue  # don't dig where you've already dug
-                self.dig(r, c)
+                self.dig(r, c, revealed)
 
         # if our initial dig didn't hit a bomb, we *shouldn't* hit a bomb here
-        return True
+        return True, revealed
 
     @property
-    def visible_board(self):
-        visible_board = [[None for _ in range(self.dim_size)] for _ in range(self.dim_size)]
-        for row in range(self.dim_size):
-            for col in range(self.dim_size):
-                if (row, col) in self.dug:
-                    visible_board[row][col] = self.board[row][col]
-                else:
-                    visible_board[row][col] = '\u200b'
-
-        return visible_board
+    def visible_board(self) -> list:
+        return [[self.board[row][col] if (row, col) in self.dug else '\u200b'
+                 for col in range(self.dim_size)]
+                for row in range(self.dim_size)]
 
     def __str__(self):
         # this is a magic function where if you call print on this object,
@@ -145,13 +144,9 @@ class Board:
         # return a string that shows the board to the player
 
         # first let's create a new array that represents what the user would see
-        visible_board = [[None for _ in range(self.dim_size)] for _ in range(self.dim_size)]
-        for row in range(self.dim_size):
-            for col in range(self.dim_size):
-                if (row, col) in self.dug:
-                    visible_board[row][col] = str(self.board[row][col])
-                else:
-                    visible_board[row][col] = ' '
+        visible_board = [[str(self.board[row][col]) if (row, col) in self.dug else ' '
+                          for col in range(self.dim_size)]
+                         for row in range(self.dim_size)]
 
         # put this together in a string
         string_rep = ''
@@ -216,7 +211,7 @@ def play(dim_size=5, num_bombs=4):
             continue
 
         # if it's valid, we dig
-        safe = board.dig(row, col)
+        safe, _ = board.dig(row, col)
         if not safe:
             # dug a bomb ahhhhhhh
             break  # (game over rip)
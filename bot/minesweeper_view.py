@@ -6,6 +6,19 @@ import supabase
 from bot.minesweeper import Board
 from bot.reputation import update_reputation
 
+_log = logging.getLogger(__name__)
+
+# Board values whose buttons keep their blank label (empty cells and mines); hashed
+# membership beats rebuilding a tuple to scan in the dig loops
+_HIDDEN_VALUES = frozenset((0, '*'))
+
+# Button styles resolved once at import instead of walking discord.ButtonStyle's enum
+# attributes for every cell update
+_STYLE_BLURPLE = discord.ButtonStyle.blurple
+_STYLE_GRAY = discord.ButtonStyle.gray
+_STYLE_RED = discord.ButtonStyle.red
+_STYLE_SUCCESS = discord.ButtonStyle.success
+
 
 class MinesweeperButton(discord.ui.Button):
     def __init__(self, x: int, y: int, *args, **kwargs):
@@ -23,7 +36,8 @@ class MinesweeperView(discord.ui.View):
     SCORING_MIN_BOMBS = 5
 
     def __init__(self, board_dimension: int, num_bombs: int,
-                 embed: discord.Embed, user: discord.User, supabase_client: supabase.Client):
+                 embed: discord.Embed, user: discord.User,
+                 supabase_client: supabase.AsyncClient):
         """
         Create a new MinesweeperView instance
         """
@@ -35,28 +49,41 @@ class MinesweeperView(discord.ui.View):
         self.user = user
         self.supabase_client = supabase_client
 
-        raw_win_val = 0.5 * (((self.num_bombs ** 2) / (self.board_dimension ** 2)) + self.num_bombs)
-        self.win_val = int(round(raw_win_val, 0))
+        # Integer round-half-even of 0.5 * ((bombs**2 / dim**2) + bombs), matching what the
+        # old float round() produced; exact halves do occur (a 4x4 board with 4 bombs is
+        # worth 2.5), so plain round-half-up would change existing payouts
+        dim_sq = self.board_dimension * self.board_dimension
+        numerator = self.num_bombs * self.num_bombs + self.num_bombs * dim_sq
+        denominator = 2 * dim_sq
+        quotient, remainder = divmod(numerator, denominator)
+
+        if remainder * 2 > denominator or (remainder * 2 == denominator and quotient % 2):
+            quotient += 1
 
-        logging.info('User started minesweeper (User: %s, Board: %s, Bombs: %s, Win Value: %s)',
-                     self.user.display_name, self.board_dimension, self.num_bombs, self.win_val)
+        self.win_val = quotient
+
+        # win_val / 3 rounded to nearest; thirds never land on a half, so this one is a
+        # plain integer expression, precomputed so the loss path in dig doesn't do it
+        self.loss_val = (self.win_val + 1) // 3
+
+        _log.info('User started minesweeper (User: %s, Board: %s, Bombs: %s, Win Value: %s)',
+                  self.user.display_name, self.board_dimension, self.num_bombs, self.win_val)
 
         self.moves = 0
         self.game = Board(dim_size=self.board_dimension, num_bombs=self.num_bombs)
+
+        # The buttons live in one flat list indexed by row * dimension + col, so the dig
+        # handler does a single subscript per cell instead of two
         self.buttons = []
 
         for row in range(self.board_dimension):
-            button_row = []
-
             for col in range(self.board_dimension):
                 button = MinesweeperButton(
-                    x=row, y=col, label='\u200b', row=row, style=discord.ButtonStyle.blurple)
-                button_row.append(button)
+                    x=row, y=col, label='\u200b', row=row, style=_STYLE_BLURPLE)
+                self.buttons.append(button)
 
                 self.add_item(button)
 
-            self.buttons.append(button_row)
-
     async def interaction_check(self, interaction: discord.Interaction, /) -> bool:
         return interaction.user == self.user
 
@@ -70,65 +97,75 @@ class MinesweeperView(discord.ui.View):
             interaction: the interaction that was triggered by a click event
         """
 
-        victory = False
         self.moves += 1
 
-        safe = self.game.dig(x, y)
+        safe, revealed = self.game.dig(x, y)
+        victory = safe and len(self.game.dug) >= self.board_dimension ** 2 - self.num_bombs
 
-        if not safe:
-            # Picked a mine
-            visible_board = self.game.board
-        elif len(self.game.dug) >= self.board_dimension ** 2 - self.num_bombs:
-            victory = True
-            visible_board = self.game.board
-        else:
-            visible_board = self.game.visible_board
+        # Locals are cheaper than global loads inside the loops below
+        dimension = self.board_dimension
+        gray = _STYLE_GRAY
+        red = _STYLE_RED
+        success = _STYLE_SUCCESS
 
-        # Update view to match game state
-        for row in range(self.board_dimension):
-            for col in range(self.board_dimension):
-                board_value = visible_board[row][col]
-                button = self.buttons[row][col]
+        if safe and not victory:
+            # Mid-game digs only change the cells they uncovered, so just flip those
+            # buttons instead of rewriting the whole grid
+            for row, col in revealed:
+                board_value = self.game.board[row][col]
+                button = self.buttons[row * dimension + col]
 
-                if board_value not in (0, '*'):
+                if board_value not in _HIDDEN_VALUES:
                     button.label = board_value
 
-                if board_value != '\u200b':
+                button.disabled = True
+                button.style = gray
+        else:
+            # The game ended, so every cell flips and the mines get styled
+            for row in range(dimension):
+                for col in range(dimension):
+                    board_value = self.game.board[row][col]
+                    button = self.buttons[row * dimension + col]
+
+                    if board_value not in _HIDDEN_VALUES:
+                        button.label = board_value
+
                     button.disabled = True
-                    button.style = discord.ButtonStyle.gray
+                    button.style = gray
 
-                if board_value == '*' and not victory:
-                    button.style = discord.ButtonStyle.red
-                    button.emoji = '💥' if (row, col) == (x, y) else '💣'
-                elif board_value == '*' and victory:
-                    button.style = discord.ButtonStyle.success
-                    button.emoji = '⛳️'
+                    if board_value == '*' and not victory:
+                        button.style = red
+                        button.emoji = '💥' if (row, col) == (x, y) else '💣'
+                    elif board_value == '*':
+                        button.style = success
+                        button.emoji = '⛳️'
 
         self.embed.set_field_at(1, name='Moves:', value=self.moves)
 
         if victory:
-            logging.info('User won minesweeper (User: %s)', interaction.user.display_name)
+            if _log.isEnabledFor(logging.INFO):
+                _log.info('User won minesweeper (User: %s)', interaction.user.display_name)
 
             self.embed.title = f'{interaction.user.display_name} found all the mines!'
             self.embed.color = discord.Color.green()
 
-            if update_reputation(interaction.user.id, self.win_val, self.supabase_client):
+            if await update_reputation(interaction.user.id, self.win_val, self.supabase_client):
                 self.embed.add_field(name='Reputation:',
                                      value=f'You have been awarded {self.win_val} reputation '
                                      f'point{"s" if self.win_val > 1 else ""}!')
             self.stop()
         elif not safe:
-            logging.info('User failed minesweeper (User: %s)', interaction.user.display_name)
+            if _log.isEnabledFor(logging.INFO):
+                _log.info('User failed minesweeper (User: %s)', interaction.user.display_name)
 
             self.embed.title = f'{interaction.user.display_name} blew up!'
             self.embed.color = discord.Color.red()
 
-            rep_change = int(round(self.win_val / 3, 0))
-
-            if update_reputation(interaction.user.id, -rep_change, self.supabase_client):
+            if await update_reputation(interaction.user.id, -self.loss_val,
+                                       self.supabase_client):
                 self.embed.add_field(name='Reputation:',
-                                     value=f'You have been fined {rep_change} reputation '
-                                     f'point{"s" if rep_change > 1 else ""}.')
+                                     value=f'You have been fined {self.loss_val} reputation '
+                                     f'point{"s" if self.loss_val > 1 else ""}.')
             self.stop()
         else:
             self.embed.title = f'{interaction.user.display_name} selected: {x}, {y}'
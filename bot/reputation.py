@@ -3,12 +3,28 @@ Functions for handling user reputation
 """
 
 import logging
+import time
 
 import supabase
 from postgrest import APIError
 
+_log = logging.getLogger(__name__)
 
-def get_reputation(user_id: int, supabase_client: supabase.Client) -> int | None:
+# Reputation reads for hot users short-circuit here instead of hitting Supabase; entries
+# map user_id -> (reputation, time.monotonic() of the fetch) and writes refresh them
+_REP_CACHE: dict[int, tuple[int, float]] = {}
+_TTL = 60.0
+
+
+def clear_reputation_cache() -> None:
+    """
+    Drop every cached reputation entry
+    """
+
+    _REP_CACHE.clear()
+
+
+async def get_reputation(user_id: int, supabase_client: supabase.AsyncClient) -> int | None:
     """
     Get a user's reputation
 
@@ -20,21 +36,30 @@ def get_reputation(user_id: int, supabase_client: supabase.Client) -> int | None
         The user's reputation or None if the user does not exist
     """
 
+    cached = _REP_CACHE.get(user_id, None)
+
+    if cached is not None and time.monotonic() - cached[1] < _TTL:
+        return cached[0]
+
     try:
-        res = supabase_client.table('users').select(
-            'reputation').eq('discord_id', str(user_id)).execute()
+        res = await supabase_client.table('users').select(
+            'reputation').eq('discord_id', user_id).execute()
     except APIError as err:
-        logging.error('Failed to get reputation for user %d: %s', user_id, err)
+        _log.error('Failed to get reputation for user %d: %s', user_id, err)
         return None
 
     if len(res.data) == 0:
-        logging.error('User %d does not exist', user_id)
+        _log.error('User %d does not exist', user_id)
         return None
 
-    return res.data[0]['reputation']
+    reputation = res.data[0]['reputation']
+    _REP_CACHE[user_id] = (reputation, time.monotonic())
+
+    return reputation
 
 
-def set_reputation(user_id: int, reputation: int, supabase_client: supabase.Client) -> bool:
+async def set_reputation(user_id: int, reputation: int,
+                         supabase_client: supabase.AsyncClient) -> bool:
     """
     Set a user's reputation
 
@@ -48,19 +73,26 @@ def set_reputation(user_id: int, reputation: int, supabase_client: supabase.Clie
     """
 
     try:
-        supabase_client.table('users').update(
-            {'reputation': reputation}).eq('discord_id', str(user_id)).execute()
+        await supabase_client.table('users').update(
+            {'reputation': reputation}).eq('discord_id', user_id).execute()
     except APIError as err:
-        logging.error('Failed to set reputation for user %d: %s', user_id, err)
+        _log.error('Failed to set reputation for user %d: %s', user_id, err)
         return False
 
+    _REP_CACHE[user_id] = (reputation, time.monotonic())
+
     return True
 
 
-def update_reputation(user_id: int, change_amount: int, supabase_client: supabase.Client) -> bool:
+async def update_reputation(user_id: int, change_amount: int,
+                            supabase_client: supabase.AsyncClient) -> bool:
     """
     Update a user's reputation
 
+    The increment happens server-side through the `increment_reputation` Postgres function
+    (see sql/increment_reputation.sql), so an update costs one round-trip instead of a
+    read-modify-write pair and can't race with concurrent changes.
+
     Args:
         user_id: The user's ID
         change_amount: The amount to add to the user's reputation
@@ -71,22 +103,26 @@ def update_reputation(user_id: int, change_amount: int, supabase_client: supabas
     """
 
     try:
-        user_rep = supabase_client.table('users').select(
-            'reputation').eq('discord_id', str(user_id)).execute()
-
-        if len(user_rep.data) == 0:
-            logging.error('User %d does not exist', user_id)
-            return False
-
-        new_rep = user_rep.data[0]['reputation'] + change_amount
-        return set_reputation(user_id, new_rep, supabase_client)
+        res = await supabase_client.rpc(
+            'increment_reputation',
+            {'p_id': user_id, 'p_delta': change_amount}).execute()
     except APIError as err:
-        logging.error('Failed to update reputation for user %d: %s', user_id, err)
+        _log.error('Failed to update reputation for user %d: %s', user_id, err)
         return False
 
+    if res.data is None:
+        _log.error('User %d does not exist', user_id)
+        return False
+
+    # The RPC returns the new score, so the cache gets refreshed for free
+    _REP_CACHE[user_id] = (res.data, time.monotonic())
+
+    return True
+
 
-def get_leaderboard(supabase_client: supabase.Client,
-                    descending: bool = True, num: int = 5) -> dict[str, int] | None:
+async def get_leaderboard(supabase_client: supabase.AsyncClient,
+                          descending: bool = True,
+                          num: int = 5) -> list[tuple[str, int]] | None:
     """
     Get the leaderboard
 
@@ -96,18 +132,20 @@ def get_leaderboard(supabase_client: supabase.Client,
         num: The number of users to return
 
     Returns:
-        A dictionary mapping user IDs to reputation or None if no users were found or an error
-        occurred
+        A list of (user name, reputation) tuples in the server's sort order or None if no
+        users were found or an error occurred
     """
 
     try:
-        res = supabase_client.table('users').select('discord_name, reputation').order(
+        res = await supabase_client.table('users').select('discord_name, reputation').order(
             'reputation', desc=descending).limit(num).execute()
     except APIError as err:
-        logging.error('Failed to get leaderboard: %s', err)
+        _log.error('Failed to get leaderboard: %s', err)
         return None
 
     if len(res.data) == 0:
         return None
 
-    return {user['discord_name']: user['reputation'] for user in res.data}
+    # The rows arrive already sorted; returning tuples keeps that order, skips an extra
+    # dict allocation, and doesn't silently collapse duplicate display names
+    return [(user['discord_name'], user['reputation']) for user in res.data]
@@ -6,13 +6,16 @@ Main script for running the Bot with a config json
 """
 
 import argparse
+import asyncio
 import dotenv
 import logging
 import os
 
-import supabase
 import discord.utils
 
+# Imported for its side effect: routes discord.py's payload serialization through orjson
+# before the client sends anything
+import bot._fast_json  # noqa: F401  pylint: disable=unused-import
 from bot.config import BotConfig
 from bot.client import BotClient
 
@@ -34,20 +37,54 @@ def get_args():
     return parser.parse_args()
 
 
+# Variables the bot can't run without; when the orchestrator already provides them all,
+# the .env stat and parse are skipped entirely
+_REQUIRED_ENV_VARS = ('SUPABASE_URL', 'SUPABASE_KEY', 'DISCORD_TOKEN')
+
+
+def _load_env():
+    """
+    Load environment variables from a .env file when any required variable is missing
+    """
+
+    env = os.environ.get
+
+    if not all(env(name) for name in _REQUIRED_ENV_VARS) and os.path.exists('.env'):
+        dotenv.load_dotenv()
+
+
+async def _startup(config_path: str) -> BotConfig:
+    """
+    Run the independent startup steps concurrently
+
+    Config parsing and .env loading are both blocking file work with no ordering
+    dependency, so they overlap in worker threads instead of running back to back.
+
+    Args:
+        config_path: the path to the config file to process
+
+    Returns:
+        The parsed `BotConfig`
+    """
+
+    config, _ = await asyncio.gather(asyncio.to_thread(BotConfig, config_path),
+                                     asyncio.to_thread(_load_env))
+
+    return config
+
+
 def main():
     """
     Run a Bot instance
     """
 
     args = get_args()
-    config = BotConfig(args.config)
-
-    # Load environment variables if a .env file exists
-    if os.path.exists('.env'):
-        dotenv.load_dotenv()
+    config = asyncio.run(_startup(args.config))
 
-    supabase_client = supabase.create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY'))
-    bot = BotClient(config, supabase_client, google_api_key=os.getenv('GOOGLE_API_KEY'))
+    # The Supabase session itself is created in BotClient.setup_hook so the async client
+    # binds to the bot's event loop
+    bot = BotClient(config, os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY'),
+                    google_api_key=os.getenv('GOOGLE_API_KEY'))
 
     handler = discord.utils.MISSING
 
@@ -0,0 +1,5 @@
+-- Discord snowflakes are 64-bit integers; storing them as text forced every reputation
+-- query to stringify the ID in Python and compare text in Postgres. bigint equality is
+-- cheaper and its B-tree index is tighter.
+ALTER TABLE users
+ALTER COLUMN discord_id TYPE bigint USING discord_id::bigint;
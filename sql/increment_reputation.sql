@@ -0,0 +1,10 @@
+-- Applies a reputation delta and returns the new score in a single statement; called by
+-- bot.reputation.update_reputation through PostgREST's RPC endpoint so a change costs one
+-- network round-trip instead of a SELECT followed by an UPDATE
+CREATE OR REPLACE FUNCTION increment_reputation(p_id bigint, p_delta int)
+RETURNS int AS $$
+    UPDATE users
+    SET reputation = reputation + p_delta
+    WHERE discord_id = p_id
+    RETURNING reputation;
+$$ LANGUAGE sql;